@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from llm_chatbot_config import (
+    MODEL_NAME, TEMPERATURE, MAX_TOKENS,
+    CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_DISK_PATH, CACHE_DISK_MAX_ENTRIES, CACHE_DISK_PRUNE_EVERY,
+)
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivial variations share one cache entry.
+    """
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+def cache_key(question: str) -> str:
+    """
+    Build the cache key from the normalized question and the generation settings.
+    """
+    raw = f"{MODEL_NAME}|{TEMPERATURE}|{MAX_TOKENS}|{normalize_question(question)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    """
+    Size-bounded LRU cache of chatbot answers with a TTL and an optional SQLite tier.
+
+    The in-memory tier is a dict lookup and is safe to use from the event loop.
+    The disk tier does blocking I/O, so async handlers go through get_async and
+    set_async, which run it on a worker thread. The disk tier holds at most
+    disk_max_entries rows plus one pruning interval.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, disk_path: str = "",
+                 disk_max_entries: int = CACHE_DISK_MAX_ENTRIES, disk_prune_every: int = CACHE_DISK_PRUNE_EVERY):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self.disk_prune_every = max(1, disk_prune_every)
+        self._entries = OrderedDict()  # key -> (answer, expires_at)
+        self._lock = threading.Lock()
+        self._disk = None
+        self._disk_lock = threading.Lock()  # Disk I/O never holds the memory tier's lock
+        self._disk_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_pruned = 0
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            # A cache can lose its last writes in a crash, so skip the fsync per commit
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS ix_answers_expires_at ON answers (expires_at)")
+            # Drop answers that expired while the service was down
+            self._prune_disk()
+
+    def get(self, question: str) -> Optional[str]:
+        """
+        Look up an answer in memory, then on disk (blocking; see get_async)
+        """
+        key = cache_key(question)
+        answer = self._get_memory(key)
+        if answer is None and self._disk is not None:
+            answer = self._get_disk(key)
+        return self._count(answer)
+
+    async def get_async(self, question: str) -> Optional[str]:
+        """
+        get for the event loop: memory hits return directly, disk lookups run on a thread
+        """
+        key = cache_key(question)
+        answer = self._get_memory(key)
+        if answer is None and self._disk is not None:
+            answer = await asyncio.to_thread(self._get_disk, key)
+        return self._count(answer)
+
+    def set(self, question: str, answer: str):
+        """
+        Store an answer in memory and on disk (blocking; see set_async)
+        """
+        key, expires_at = self._set_memory(question, answer)
+        if self._disk is not None:
+            self._set_disk(key, answer, expires_at)
+
+    async def set_async(self, question: str, answer: str):
+        """
+        set for the event loop: the disk write and any pruning run on a thread
+        """
+        key, expires_at = self._set_memory(question, answer)
+        if self._disk is not None:
+            await asyncio.to_thread(self._set_disk, key, answer, expires_at)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] > time.time():
+                self._entries.move_to_end(key)
+                return entry[0]
+            del self._entries[key]
+            return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT answer, expires_at FROM answers WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._store(key, row[0], row[1])
+            self.disk_hits += 1
+        return row[0]
+
+    def _count(self, answer: Optional[str]) -> Optional[str]:
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    def _set_memory(self, question: str, answer: str):
+        key = cache_key(question)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, answer, expires_at)
+        return key, expires_at
+
+    def _set_disk(self, key: str, answer: str, expires_at: float):
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, expires_at) VALUES (?, ?, ?)",
+                (key, answer, expires_at)
+            )
+            self._disk.commit()
+            self._disk_writes += 1
+            if self._disk_writes % self.disk_prune_every == 0:
+                self._prune_disk()
+
+    def _prune_disk(self):
+        # Caller holds the disk lock (or is the constructor). Every entry gets the
+        # same TTL, so the earliest expiry is also the least recently written
+        cursor = self._disk.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+        pruned = cursor.rowcount
+        excess = self._disk.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.disk_max_entries
+        if excess > 0:
+            cursor = self._disk.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+            pruned += cursor.rowcount
+        self._disk.commit()
+        self.disk_pruned += pruned
+
+    def _store(self, key: str, answer: str, expires_at: float):
+        # Caller holds the lock
+        self._entries[key] = (answer, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM answers")
+                self._disk.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_pruned": self.disk_pruned,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "disk_tier": self._disk is not None,
+            }
+
+# Shared cache instance for the service
+answer_cache = AnswerCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_DISK_PATH)
@@ -12,3 +12,43 @@ if not MISTRAL_API_KEY:
 MODEL_NAME = "mistral-small-latest"  
 TEMPERATURE = 0.7
 MAX_TOKENS = 150
+
+# Upstream endpoint (overridable so we can point at a local fake for testing/benchmarks)
+MISTRAL_API_URL = os.getenv("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+
+# HTTP connection pool shared by every request for the life of the app
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Upstream timeouts in seconds
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+
+# Answer cache for repeated questions
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "86400"))
+# Optional SQLite file so warm answers survive a restart (empty disables the disk tier)
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH", "")
+# Row cap for the disk tier; expired and least recently written rows are pruned
+# every CACHE_DISK_PRUNE_EVERY writes, so the file holds at most cap + that many
+CACHE_DISK_MAX_ENTRIES = int(os.getenv("CACHE_DISK_MAX_ENTRIES", "100000"))
+CACHE_DISK_PRUNE_EVERY = int(os.getenv("CACHE_DISK_PRUNE_EVERY", "100"))
+
+# Upstream concurrency limit: at most UPSTREAM_MAX_CONCURRENCY calls in flight,
+# UPSTREAM_MAX_QUEUE callers waiting, anything beyond that is shed with a 429
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "16"))
+UPSTREAM_MAX_QUEUE = int(os.getenv("UPSTREAM_MAX_QUEUE", "64"))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", "10"))
+UPSTREAM_RETRY_AFTER_SECONDS = int(os.getenv("UPSTREAM_RETRY_AFTER_SECONDS", "2"))
+
+# Per-client token bucket in front of the upstream: CLIENT_RATE_BURST questions at
+# once, refilled at CLIENT_RATE_PER_SECOND; idle clients are forgotten once refilled
+CLIENT_RATE_BURST = int(os.getenv("CLIENT_RATE_BURST", "10"))
+CLIENT_RATE_PER_SECOND = float(os.getenv("CLIENT_RATE_PER_SECOND", "0.2"))
+CLIENT_RATE_MAX_CLIENTS = int(os.getenv("CLIENT_RATE_MAX_CLIENTS", "100000"))
+if CLIENT_RATE_PER_SECOND <= 0:
+    raise ValueError(f"CLIENT_RATE_PER_SECOND must be positive, got {CLIENT_RATE_PER_SECOND}")
+if CLIENT_RATE_MAX_CLIENTS < 1:
+    raise ValueError(f"CLIENT_RATE_MAX_CLIENTS must be at least 1, got {CLIENT_RATE_MAX_CLIENTS}")
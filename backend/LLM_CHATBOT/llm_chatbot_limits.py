@@ -0,0 +1,159 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from llm_chatbot_config import (
+    CLIENT_RATE_BURST, CLIENT_RATE_MAX_CLIENTS, CLIENT_RATE_PER_SECOND, UPSTREAM_MAX_CONCURRENCY, UPSTREAM_MAX_QUEUE, UPSTREAM_QUEUE_TIMEOUT, UPSTREAM_RETRY_AFTER_SECONDS,
+)
+
+class UpstreamBusyError(Exception):
+    """
+    Raised when the upstream wait queue is full (or the wait timed out).
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("429: Too many chatbot requests, please retry later")
+        self.retry_after = retry_after
+
+class ConcurrencyLimiter:
+    """
+    Cap in-flight upstream calls and bound the number of callers waiting for a slot.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+
+    def is_saturated(self) -> bool:
+        """
+        True when a new caller would be shed right now (all slots busy and the queue full).
+        """
+        return self._semaphore.locked() and self.waiting >= self.max_queue
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                raise UpstreamBusyError(self.retry_after)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise UpstreamBusyError(self.retry_after)
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "shed": self.shed,
+        }
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers asking for the same key.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, call):
+        """
+        Await `call()` once per key; concurrent callers with the same key get the same result.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.followers += 1
+            # shield() so a follower disconnecting does not cancel everyone else's call
+            return await asyncio.shield(task)
+
+        self.leaders += 1
+        task = asyncio.ensure_future(call())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"in_flight_keys": len(self._calls), "leaders": self.leaders, "followers": self.followers}
+
+class ClientRateLimiter:
+    """
+    Token bucket per client (IP), so one caller can't monopolize the upstream slots.
+
+    Buckets are kept in least recently used order; ones idle long enough to have
+    refilled completely are dropped from the front, so memory follows active clients.
+    """
+
+    def __init__(self, burst: int, per_second: float, max_clients: int):
+        if per_second <= 0:
+            raise ValueError(f"per_second must be positive, got {per_second}")
+        if max_clients < 1:
+            raise ValueError(f"max_clients must be at least 1, got {max_clients}")
+        self.burst = burst
+        self.per_second = per_second
+        self.max_clients = max_clients
+        self.idle_seconds = burst / per_second
+        self._buckets = OrderedDict()  # client -> [tokens, updated_at]
+        self.allowed = 0
+        self.limited = 0
+
+    def check(self, client: str, now: float = None):
+        """
+        Take a token for client, or raise UpstreamBusyError with the wait until the next one.
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            self._buckets.move_to_end(client)
+        while self._buckets and (
+            len(self._buckets) > self.max_clients or now - next(iter(self._buckets.values()))[1] >= self.idle_seconds
+        ):
+            self._buckets.popitem(last=False)
+
+        if bucket[0] < 1:
+            self.limited += 1
+            raise UpstreamBusyError(math.ceil((1 - bucket[0]) / self.per_second))
+        bucket[0] -= 1
+        self.allowed += 1
+
+    def stats(self) -> dict:
+        return {
+            "burst": self.burst,
+            "per_second": self.per_second,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+upstream_limiter = ConcurrencyLimiter(
+    UPSTREAM_MAX_CONCURRENCY, UPSTREAM_MAX_QUEUE, UPSTREAM_QUEUE_TIMEOUT, UPSTREAM_RETRY_AFTER_SECONDS
+)
+single_flight = SingleFlight()
+client_limiter = ClientRateLimiter(CLIENT_RATE_BURST, CLIENT_RATE_PER_SECOND, CLIENT_RATE_MAX_CLIENTS)
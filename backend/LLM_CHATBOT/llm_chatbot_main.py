@@ -1,10 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from llm_chatbot_service import router as chatbot_router
+from llm_chatbot_utils import get_http_client, close_http_client
+from llm_chatbot_cache import answer_cache
+from llm_chatbot_limits import client_limiter, single_flight, upstream_limiter
+from llm_chatbot_metrics import RequestMetricsMiddleware, render_metrics, stream_timings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared upstream connection pool once and close it on shutdown
+    get_http_client()
+    yield
+    await close_http_client()
 
 app = FastAPI(
     title="LLM Chatbot Microservice",
-    description="Handles AI-powered fitness chatbot."
+    description="Handles AI-powered fitness chatbot.",
+    lifespan=lifespan
 )
 
 # 1) Enable CORS so the React frontend (port 3000) can communicate
@@ -16,6 +30,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 # 2) Register the chatbot service with the prefix `/chatbot`
 app.include_router(chatbot_router, prefix="/chatbot", tags=["Chatbot"])
@@ -28,3 +43,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+# 4) Prometheus metrics: request latency per route plus cache, upstream and rate limit figures
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics({
+        "cache": answer_cache.stats(),
+        "streaming": stream_timings.stats(),
+        "upstream": upstream_limiter.stats(),
+        "coalescing": single_flight.stats(),
+        "rate_limit": client_limiter.stats(),
+    }), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,149 @@
+import threading
+import time
+from bisect import bisect_left
+
+class StreamTimings:
+    """
+    Aggregate time-to-first-byte and total duration of streamed answers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.ttfb_seconds_sum = 0.0
+        self.ttfb_seconds_max = 0.0
+        self.ttfb_count = 0
+        self.total_seconds_sum = 0.0
+        self.total_seconds_max = 0.0
+
+    def stream_started(self):
+        with self._lock:
+            self.started += 1
+
+    def first_byte(self, seconds: float):
+        with self._lock:
+            self.ttfb_count += 1
+            self.ttfb_seconds_sum += seconds
+            self.ttfb_seconds_max = max(self.ttfb_seconds_max, seconds)
+
+    def stream_finished(self, seconds: float, outcome: str):
+        """
+        Record a finished stream; outcome is "completed", "cancelled" or "failed".
+        """
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.total_seconds_sum += seconds
+            self.total_seconds_max = max(self.total_seconds_max, seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.cancelled + self.failed
+            return {
+                "started": self.started,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "avg_ttfb_ms": round(self.ttfb_seconds_sum / self.ttfb_count * 1000, 2) if self.ttfb_count else 0.0,
+                "max_ttfb_ms": round(self.ttfb_seconds_max * 1000, 2),
+                "avg_total_ms": round(self.total_seconds_sum / finished * 1000, 2) if finished else 0.0,
+                "max_total_ms": round(self.total_seconds_max * 1000, 2),
+            }
+
+stream_timings = StreamTimings()
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _labels(pairs) -> str:
+    escaped = ((name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+class RequestMetrics:
+    """
+    Request latency histograms per (method, route template, status) and an in-flight gauge.
+
+    Each sample only bumps one bucket counter; buckets are made cumulative when scraped.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # (method, route, status) -> [bucket counts, sum]
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.setdefault((method, route, str(status)), [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self) -> list:
+        name = "http_request_duration_seconds"
+        lines = [
+            "# HELP http_requests_in_flight HTTP requests currently being served",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            f"# HELP {name} HTTP request latency by route template and status",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for (method, route, status), counts, total in series:
+            base = (("method", method), ("route", route), ("status", status))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(base + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(base)} {total}")
+            lines.append(f"{name}_count{_labels(base)} {cumulative}")
+        return lines
+
+request_metrics = RequestMetrics()
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware feeding request_metrics (route templates, never raw paths).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        request_metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_metrics.in_flight -= 1
+            # Routes of included routers only know their own path; FastAPI keeps the prefixed one
+            context = scope.get("fastapi", {}).get("effective_route_context")
+            route = getattr(context, "path", None) or getattr(scope.get("route"), "path", None) or "unmatched"
+            request_metrics.observe(scope["method"], route, status, time.perf_counter() - start)
+
+def render_metrics(sections: dict) -> str:
+    """
+    Prometheus text: the request metrics plus every numeric figure of the given
+    stats() sections as a chatbot_<section>_<name> gauge.
+    """
+    lines = request_metrics.render()
+    for section, stats in sections.items():
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"chatbot_{section}_{key}"
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
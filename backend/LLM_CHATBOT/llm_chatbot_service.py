@@ -1,10 +1,29 @@
-from fastapi import APIRouter, HTTPException
-from llm_chatbot_utils import ask_llm_chatbot
+import json
+import time
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from llm_chatbot_utils import ask_llm_chatbot, stream_llm_chatbot
+from llm_chatbot_cache import answer_cache, cache_key
+from llm_chatbot_limits import UpstreamBusyError, client_limiter, upstream_limiter, single_flight
+from llm_chatbot_metrics import stream_timings
 
 router = APIRouter(prefix="/llm_chatbot")
 
+def too_many_requests(error: UpstreamBusyError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+async def ask_upstream(query_text: str):
+    """
+    Call Mistral while holding one of the limited upstream slots.
+    """
+    async with upstream_limiter.slot():
+        return await ask_llm_chatbot(query_text)
+
+def client_id(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
 @router.post("/")
-async def chatbot_endpoint(request: dict):
+async def chatbot_endpoint(request: dict, http_request: Request):
     """
     Handle user queries to LLM Chatbot.
     """
@@ -13,11 +32,109 @@ async def chatbot_endpoint(request: dict):
     if not query_text:
         raise HTTPException(status_code=400, detail="400: Query cannot be empty")
 
-    response = ask_llm_chatbot(query_text)
+    cached = await answer_cache.get_async(query_text)
+    if cached is not None:
+        return {"response": cached}
+
+    # Only questions that go upstream count against the caller's rate limit;
+    # identical questions already in flight share the same upstream call
+    try:
+        client_limiter.check(client_id(http_request))
+        response = await single_flight.do(cache_key(query_text), lambda: ask_upstream(query_text))
+    except UpstreamBusyError as e:
+        raise too_many_requests(e)
 
     if isinstance(response, dict) and "error" in response:
         error_message = response["error"]
         error_code = int(error_message.split(":")[0]) if error_message.split(":")[0].isdigit() else 500
         raise HTTPException(status_code=error_code, detail=error_message)
 
-    return {"response": response}
\ No newline at end of file
+    await answer_cache.set_async(query_text, response)
+    return {"response": response}
+
+def sse_event(data: dict, event: str = None) -> str:
+    """
+    Format one Server-Sent Event.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chatbot_stream_endpoint(body: dict, request: Request):
+    """
+    Stream the chatbot answer as Server-Sent Events while Mistral generates it.
+
+    Emits `data: {"token": ...}` events, then `event: done` (or `event: error`).
+    """
+    query_text = body.get("question", "").strip()
+
+    if not query_text:
+        raise HTTPException(status_code=400, detail="400: Query cannot be empty")
+
+    if upstream_limiter.is_saturated():
+        raise too_many_requests(UpstreamBusyError(upstream_limiter.retry_after))
+
+    async def event_stream():
+        started = time.perf_counter()
+        first_byte = False
+        outcome = "cancelled"
+        stream_timings.stream_started()
+        try:
+            cached = await answer_cache.get_async(query_text)
+            if cached is not None:
+                stream_timings.first_byte(time.perf_counter() - started)
+                yield sse_event({"token": cached})
+                yield sse_event({"cached": True}, event="done")
+                outcome = "completed"
+                return
+
+            tokens = []
+            try:
+                client_limiter.check(client_id(request))
+                async with upstream_limiter.slot():
+                    upstream = stream_llm_chatbot(query_text)
+                    try:
+                        async for token in upstream:
+                            if isinstance(token, dict):
+                                outcome = "failed"
+                                yield sse_event({"detail": token["error"]}, event="error")
+                                return
+                            if await request.is_disconnected():
+                                return
+                            if not first_byte:
+                                first_byte = True
+                                stream_timings.first_byte(time.perf_counter() - started)
+                            tokens.append(token)
+                            yield sse_event({"token": token})
+                    finally:
+                        # Closing the upstream generator drops the Mistral connection
+                        await upstream.aclose()
+            except UpstreamBusyError as e:
+                outcome = "failed"
+                yield sse_event({"detail": str(e), "retry_after": e.retry_after}, event="error")
+                return
+
+            if tokens:
+                await answer_cache.set_async(query_text, "".join(tokens).strip())
+            outcome = "completed"
+            yield sse_event({"cached": False}, event="done")
+        finally:
+            stream_timings.stream_finished(time.perf_counter() - started, outcome)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stats")
+async def chatbot_stats():
+    """
+    Report answer cache, streaming latency, upstream concurrency and rate limiting figures.
+    """
+    return {
+        "cache": answer_cache.stats(),
+        "streaming": stream_timings.stats(),
+        "upstream": {**upstream_limiter.stats(), "coalescing": single_flight.stats()},
+        "rate_limit": client_limiter.stats(),
+    }
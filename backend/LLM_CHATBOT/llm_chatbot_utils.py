@@ -1,45 +1,127 @@
-import os
-import requests
 import json
-from llm_chatbot_config import MISTRAL_API_KEY, MODEL_NAME, TEMPERATURE, MAX_TOKENS
+import httpx
+from llm_chatbot_config import (
+    MISTRAL_API_KEY, MISTRAL_API_URL, MODEL_NAME, TEMPERATURE, MAX_TOKENS,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_TIMEOUT,
+)
 
-MISTRAL_API_URL = "https://api.mistral.ai/v1/chat/completions"
+SYSTEM_PROMPT = "You are a fitness and nutrition expert. Answer only fitness and nutrition-related questions."
 
-def ask_llm_chatbot(user_query: str):
+# Shared client: one keep-alive connection pool for the whole process
+_http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
     """
-    Send a user query to Mistral AI API and return a response.
+    Return the shared async HTTP client, creating it on first use.
     """
-    if not user_query or not user_query.strip():
-        return {"error": "400: Query cannot be empty"}
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {MISTRAL_API_KEY.strip()}",
+                "Content-Type": "application/json"
+            },
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=HTTP_CONNECT_TIMEOUT,
+                read=HTTP_READ_TIMEOUT,
+                write=HTTP_READ_TIMEOUT,
+                pool=HTTP_POOL_TIMEOUT,
+            ),
+        )
+    return _http_client
 
-    headers = {
-        "Authorization": f"Bearer {MISTRAL_API_KEY.strip()}",
-        "Content-Type": "application/json"
-    }
+async def close_http_client():
+    """
+    Close the shared HTTP client and release its pooled connections.
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
-    payload = json.dumps({
+def build_payload(user_query: str) -> dict:
+    """
+    Build the Mistral chat completion request body for a user query.
+    """
+    return {
         "model": MODEL_NAME,
         "messages": [
-            {"role": "system", "content": "You are a fitness and nutrition expert. Answer only fitness and nutrition-related questions."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user_query.strip()}
         ],
         "temperature": TEMPERATURE,
         "max_tokens": MAX_TOKENS
-    })
+    }
+
+async def ask_llm_chatbot(user_query: str):
+    """
+    Send a user query to Mistral AI API and return a response.
+    """
+    if not user_query or not user_query.strip():
+        return {"error": "400: Query cannot be empty"}
 
     try:
-        response = requests.post(MISTRAL_API_URL, headers=headers, data=payload)
+        response = await get_http_client().post(MISTRAL_API_URL, json=build_payload(user_query))
         response_json = response.json()
 
-        print("🔹 DEBUG: Full API Response:", response_json)
-
         if response.status_code != 200:
             return {"error": f"500: Mistral API Error: {response_json.get('error', 'Unknown error')}"}
 
         return response_json["choices"][0]["message"]["content"].strip()
 
-    except requests.exceptions.RequestException as e:
+    except httpx.TimeoutException as e:
+        return {"error": f"504: Mistral API Timeout: {str(e) or type(e).__name__}"}
+
+    except httpx.HTTPError as e:
         return {"error": f"500: API Connection Error: {str(e)}"}
 
     except Exception as e:
-        return {"error": f"500: Internal Server Error: {str(e)}"}
\ No newline at end of file
+        return {"error": f"500: Internal Server Error: {str(e)}"}
+
+async def stream_llm_chatbot(user_query: str):
+    """
+    Stream a Mistral answer token by token.
+
+    Yields text deltas as they arrive. Errors are yielded as a final
+    {"error": "<code>: <message>"} dict, matching ask_llm_chatbot.
+    Closing the generator early closes the upstream connection, so
+    Mistral stops generating for clients that went away.
+    """
+    if not user_query or not user_query.strip():
+        yield {"error": "400: Query cannot be empty"}
+        return
+
+    payload = build_payload(user_query)
+    payload["stream"] = True
+
+    try:
+        async with get_http_client().stream("POST", MISTRAL_API_URL, json=payload) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                yield {"error": f"500: Mistral API Error: {body.decode('utf-8', 'replace')}"}
+                return
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    except httpx.TimeoutException as e:
+        yield {"error": f"504: Mistral API Timeout: {str(e) or type(e).__name__}"}
+
+    except httpx.HTTPError as e:
+        yield {"error": f"500: API Connection Error: {str(e)}"}
+
+    except (ValueError, KeyError, IndexError) as e:
+        yield {"error": f"500: Internal Server Error: {str(e)}"}
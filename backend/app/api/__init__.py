@@ -7,5 +7,8 @@ This package contains all the API routes organized by feature:
 - workouts: Workout tracking endpoints
 - nutrition: Nutrition logging endpoints
 - weight: Weight tracking endpoints
+- summary: Daily calorie and workout totals
+- dashboard: Composite dashboard payload
+- export: Streaming download of a user's full history
 - training_programs: Training program endpoints
 """
\ No newline at end of file
@@ -1,19 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, Dict, Any
-import bcrypt
-import jwt
-from datetime import datetime, timedelta, timezone
-from app.database import get_db
+from app.core.security import create_access_token, get_current_user, get_user_by_username, get_password_hash_async, verify_password_async, principal_cache
+from app.database import get_db, run_db
 from app.models import UserDB, PasswordResetToken
 
-# Constants from main.py
-SECRET_KEY = "your_secret_key"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
 # Models for auth
 class User(BaseModel):
     username: str
@@ -32,6 +25,18 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
+# Public view of a user (never includes the password hash)
+class UserProfile(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    name: str
+    age: int
+    gender: Optional[str] = None
+    height: Optional[float] = None
+    weight: Optional[float] = None
+
 class PasswordResetRequest(BaseModel):
     username: str
     email: Optional[str] = None
@@ -40,65 +45,30 @@ class PasswordResetConfirm(BaseModel):
     username: str
     new_password: str
 
-# OAuth2 scheme
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
-
-# Utility functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Verify password using bcrypt
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
-
-def get_password_hash(password: str) -> str:
-    # Hash password using bcrypt
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(UserDB).filter(UserDB.username == username).first()
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-def add_email_column(db: Session):
-    try:
-        # Use a more robust method to add column only if it doesn't exist
-        from sqlalchemy import text
-        db.execute(text('''
-            ALTER TABLE users ADD COLUMN IF NOT EXISTS email TEXT;
-        '''))
-        db.commit()
-    except Exception as e:
-        print(f"Error adding email column: {e}")
-        db.rollback()
+def save_user(db: Session, db_user: UserDB):
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+
+def update_password(db: Session, username: str, hashed_password: str):
+    db.query(UserDB).filter(UserDB.username == username).update({"password": hashed_password})
+    db.commit()
 
 # Create router
 router = APIRouter(tags=["Authentication"])
 
 # Authentication Endpoints
+# These are async so bcrypt can be awaited on its own pool; database calls
+# go through run_db, so they work with sync and async sessions alike.
+# The session is closed before hashing so a queued bcrypt job never holds
+# a pooled database connection.
 @router.post("/register", summary="Register User")
-def register_user(user: User, db: Session = Depends(get_db)):
-    # First, try to add the email column (this is safe to call multiple times)
-    add_email_column(db)
-
-    if db.query(UserDB).filter(UserDB.username == user.username).first():
+async def register_user(user: User, db: Session = Depends(get_db)):
+    if await run_db(db, get_user_by_username, user.username):
         raise HTTPException(status_code=400, detail="Username already taken")
+    await run_db(db, Session.close)
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = UserDB(
         username=user.username,
         password=hashed_password,
@@ -109,9 +79,7 @@ def register_user(user: User, db: Session = Depends(get_db)):
         weight=user.weight,
         email=user.email,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await run_db(db, save_user, db_user)
     return {
         "message": "User registered successfully",
         "user": {
@@ -127,38 +95,28 @@ def register_user(user: User, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=Token, summary="User Login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(UserDB).filter(UserDB.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_db(db, get_user_by_username, form_data.username)
+    await run_db(db, Session.close)
+    if not user or not await verify_password_async(form_data.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.get("/me", summary="Get Current User")
-def read_users_me(current_user: UserDB = Depends(get_current_user)):
-    return {
-        "id": current_user.id, 
-        "username": current_user.username,
-        "name": current_user.name,
-        "age": current_user.age,
-        "gender": current_user.gender,
-        "height": current_user.height,
-        "weight": current_user.weight
-    }
+@router.get("/me", response_model=UserProfile, summary="Get Current User")
+async def read_users_me(current_user: UserDB = Depends(get_current_user)):
+    return current_user
 
 @router.post("/password-reset-request")
-def request_password_reset(reset_request: PasswordResetRequest, db: Session = Depends(get_db)):
-    # First, try to add the email column (this is safe to call multiple times)
-    add_email_column(db)
-
+async def request_password_reset(reset_request: PasswordResetRequest, db: Session = Depends(get_db)):
     # Find user by username
-    user = db.query(UserDB).filter(UserDB.username == reset_request.username).first()
+    user = await run_db(db, get_user_by_username, reset_request.username)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
 @router.post("/password-reset-confirm")
-def reset_password(reset_data: PasswordResetConfirm, db: Session = Depends(get_db)):
+async def reset_password(reset_data: PasswordResetConfirm, db: Session = Depends(get_db)):
     """
     Confirm password reset for a user
     """
@@ -167,7 +125,7 @@ def reset_password(reset_data: PasswordResetConfirm, db: Session = Depends(get_d
         raise HTTPException(status_code=400, detail="Username and new password are required")
 
     # Find the user by username
-    user = db.query(UserDB).filter(UserDB.username == reset_data.username).first()
+    user = await run_db(db, get_user_by_username, reset_data.username)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -177,13 +135,12 @@ def reset_password(reset_data: PasswordResetConfirm, db: Session = Depends(get_d
         raise HTTPException(status_code=400, detail="Password must be at least 8 characters long")
 
     # Hash the new password
-    hashed_password = get_password_hash(reset_data.new_password)
+    await run_db(db, Session.close)
+    hashed_password = await get_password_hash_async(reset_data.new_password)
     
-    # Update the user's password
-    user.password = hashed_password
-    
-    # Commit the changes
-    db.commit()
+    # Update the user's password and commit the changes
+    await run_db(db, update_password, reset_data.username, hashed_password)
+    principal_cache.invalidate_user(reset_data.username)
 
     return {
         "status": "success", 
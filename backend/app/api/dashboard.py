@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+import asyncio
+from app.api.auth import UserProfile, get_current_user
+from app.api.workouts import query_workouts
+from app.database import get_read_session_factory, run_in_new_session
+from app.models import DailySummaryDB, UserDB, WeightLogDB, WorkoutDB
+
+router = APIRouter()
+
+class DashboardWorkout(BaseModel):
+    id: int
+    exercise: str
+    duration: int
+
+class DashboardCalories(BaseModel):
+    total: int
+    entries: int
+
+class DashboardWeight(BaseModel):
+    weight: float
+    date: date
+
+class DashboardResponse(BaseModel):
+    user: UserProfile
+    date: date
+    workouts: List[DashboardWorkout]
+    calories: DashboardCalories
+    latest_weight: Optional[DashboardWeight] = None
+
+def day_workouts(db: Session, user_id: int, day: date) -> list:
+    query = query_workouts(db, user_id, day, day).with_entities(WorkoutDB.id, WorkoutDB.exercise, WorkoutDB.duration)
+    return [row._asdict() for row in query]
+
+def day_calories(db: Session, user_id: int, day: date) -> dict:
+    # One rollup row instead of summing the day's nutrition logs
+    row = (
+        db.query(DailySummaryDB.total_calories, DailySummaryDB.nutrition_entries)
+        .filter(DailySummaryDB.user_id == user_id, DailySummaryDB.date == day)
+        .first()
+    )
+    if row is None:
+        return {"total": 0, "entries": 0}
+    return {"total": row.total_calories, "entries": row.nutrition_entries}
+
+def latest_weight(db: Session, user_id: int) -> Optional[dict]:
+    row = (
+        db.query(WeightLogDB.weight, WeightLogDB.date)
+        .filter(WeightLogDB.user_id == user_id)
+        .order_by(WeightLogDB.date.desc(), WeightLogDB.id.desc())
+        .first()
+    )
+    return row._asdict() if row else None
+
+@router.get("", response_model=DashboardResponse, summary="Get Dashboard")
+async def get_dashboard(
+    day: Optional[date] = Query(None, alias="date", description="Day to summarize (default: today)"),
+    current_user: UserDB = Depends(get_current_user),
+    session_factory = Depends(get_read_session_factory),
+):
+    """ Profile, the day's workouts and calorie total, and the latest weight in one response """
+    day = day or date.today()
+    user_id = current_user.id
+    # Independent reads, each on its own session so they run concurrently
+    workouts, calories, weight = await asyncio.gather(
+        run_in_new_session(session_factory, day_workouts, user_id, day),
+        run_in_new_session(session_factory, day_calories, user_id, day),
+        run_in_new_session(session_factory, latest_weight, user_id),
+    )
+    return {
+        "user": current_user,
+        "date": day,
+        "workouts": workouts,
+        "calories": calories,
+        "latest_weight": weight,
+    }
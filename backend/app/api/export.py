@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import csv
+import io
+import json
+import zlib
+from app.core.config import config
+from app.database import get_read_session_factory
+from app.models import NutritionLogDB, WeightLogDB, WorkoutDB
+
+router = APIRouter()
+
+# Flat record layout shared by both formats; columns that don't apply to a record type are empty
+EXPORT_COLUMNS = ["type", "id", "date", "exercise", "duration", "food", "calories", "weight"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_statements(user_id: int):
+    """
+    One statement per record type, each a (user_id, date) index range in date order.
+    """
+    return [
+        select(literal("workout").label("type"), WorkoutDB.id, WorkoutDB.date, WorkoutDB.exercise, WorkoutDB.duration)
+        .where(WorkoutDB.user_id == user_id)
+        .order_by(WorkoutDB.date, WorkoutDB.id),
+        select(literal("nutrition").label("type"), NutritionLogDB.id, NutritionLogDB.date, NutritionLogDB.food, NutritionLogDB.calories)
+        .where(NutritionLogDB.user_id == user_id)
+        .order_by(NutritionLogDB.date, NutritionLogDB.id),
+        select(literal("weight").label("type"), WeightLogDB.id, WeightLogDB.date, WeightLogDB.weight)
+        .where(WeightLogDB.user_id == user_id)
+        .order_by(WeightLogDB.date, WeightLogDB.id),
+    ]
+
+def encode_rows(rows, export_format: str) -> str:
+    """
+    Render one chunk of result rows as NDJSON lines or CSV records.
+    """
+    records = []
+    for row in rows:
+        record = row._asdict()
+        if record["date"] is not None:
+            record["date"] = record["date"].isoformat()
+        records.append(record)
+    if export_format == "ndjson":
+        return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, EXPORT_COLUMNS, lineterminator="\n").writerows(records)
+    return buffer.getvalue()
+
+class ChunkEncoder:
+    """
+    Turns text chunks into response bytes, gzip-compressing on the fly when asked to
+    """
+
+    def __init__(self, compress: bool):
+        # wbits=31 writes a gzip header/trailer, so the stream is a valid .gz file
+        self._compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+def stream_export(session_factory, user_id: int, export_format: str, compress: bool):
+    """
+    Generator of export bytes; the session only ever holds one chunk of rows.
+    """
+    encoder = ChunkEncoder(compress)
+    if export_format == "csv":
+        yield encoder.encode(",".join(EXPORT_COLUMNS) + "\n")
+    db = session_factory()
+    try:
+        for statement in export_statements(user_id):
+            result = db.execute(statement.execution_options(yield_per=config.EXPORT_CHUNK_ROWS))
+            for rows in result.partitions():
+                chunk = encoder.encode(encode_rows(rows, export_format))
+                if chunk:
+                    yield chunk
+    finally:
+        db.close()
+    yield encoder.finish()
+
+async def stream_export_async(session_factory, user_id: int, export_format: str, compress: bool):
+    """
+    stream_export for async sessions: rows are streamed from the driver chunk by chunk.
+    """
+    encoder = ChunkEncoder(compress)
+    if export_format == "csv":
+        yield encoder.encode(",".join(EXPORT_COLUMNS) + "\n")
+    async with session_factory() as db:
+        for statement in export_statements(user_id):
+            result = await db.stream(statement.execution_options(yield_per=config.EXPORT_CHUNK_ROWS))
+            async for rows in result.partitions():
+                chunk = encoder.encode(encode_rows(rows, export_format))
+                if chunk:
+                    yield chunk
+    yield encoder.finish()
+
+@router.get("/{user_id}", summary="Export User History")
+async def export_history(
+    user_id: int,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    compress: bool = Query(False, alias="gzip", description="Gzip the stream (downloads as .gz)"),
+    session_factory = Depends(get_read_session_factory),
+):
+    """
+    Stream every workout, nutrition log and weight log of a user, in date order per type.
+    """
+    filename = f"user_{user_id}_history.{export_format}"
+    media_type = MEDIA_TYPES[export_format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    if issubclass(session_factory.class_, AsyncSession):
+        body = stream_export_async(session_factory, user_id, export_format, compress)
+    else:
+        body = stream_export(session_factory, user_id, export_format, compress)
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f"attachment; filename={filename}"})
@@ -1,47 +1,153 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Dict, Optional
-from datetime import datetime
-from app.database import get_db
+from typing import Any, List, Dict, Optional
+from datetime import date, datetime
+import time
+from app.core.bulk import validate_items, bulk_insert, finish_results
+from app.core.config import config
+from app.core.pagination import encode_cursor, decode_cursor
+from app.database import get_db, get_read_db, run_db
 from app.models import NutritionLogDB
+from app.rollups import record_nutrition
 
 router = APIRouter()
 
+# Alias so the optional `date` field below doesn't shadow its own type
+LogDate = date
+
 class NutritionLog(BaseModel):
     user_id: int
     food: str
     calories: int
+    date: Optional[LogDate] = None  # Defaults to today
 
-@router.post("", summary="Add Nutrition Log")
-def add_nutrition_log(log: NutritionLog, db: Session = Depends(get_db)) -> dict:
+class NutritionLogOut(BaseModel):
+    id: int
+    food: str
+    calories: int
+    date: Optional[LogDate] = None
+
+class NutritionLogsResponse(BaseModel):
+    user_id: int
+    logs: List[NutritionLogOut]
+    next_cursor: Optional[str] = None  # Only present on paginated requests
+
+def save_nutrition_log(db: Session, log: NutritionLog) -> dict:
     db_log = NutritionLogDB(
         user_id=log.user_id,
         food=log.food,
         calories=log.calories,
+        date=log.date or date.today(),
     )
     db.add(db_log)
+    record_nutrition(db, [{"user_id": db_log.user_id, "date": db_log.date, "calories": db_log.calories}])
     db.commit()
     db.refresh(db_log)
+    return {
+        "id": db_log.id,
+        "user_id": db_log.user_id,
+        "food": db_log.food,
+        "calories": db_log.calories,
+        "date": db_log.date,
+    }
+
+@router.post("", summary="Add Nutrition Log")
+async def add_nutrition_log(log: NutritionLog, db: Session = Depends(get_db)) -> dict:
     return {
         "message": "Nutrition log added successfully",
-        "log": {
-            "id": db_log.id,
-            "user_id": db_log.user_id,
-            "food": db_log.food,
-            "calories": db_log.calories,
-        },
+        "log": await run_db(db, save_nutrition_log, log),
     }
 
+def save_nutrition_logs_bulk(db: Session, rows: List[dict]) -> list:
+    try:
+        ids = bulk_insert(db, NutritionLogDB, rows)
+        record_nutrition(db, rows)
+        db.commit()
+        return ids
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@router.get("/{user_id}", summary="Get Nutrition Logs")
-def get_nutrition_logs(user_id: int, db: Session = Depends(get_db)) -> dict:
-    logs = db.query(NutritionLogDB).filter(NutritionLogDB.user_id == user_id).all()
-    if not logs:
+@router.post("/bulk", summary="Add Nutrition Logs in Bulk")
+async def add_nutrition_logs_bulk(entries: List[Dict[str, Any]], db: Session = Depends(get_db)) -> dict:
+    """ Save many nutrition logs in one transaction (e.g. a client syncing after being offline) """
+    started = time.perf_counter()
+    valid, results = validate_items(entries, NutritionLog)
+    today = date.today()
+    rows = [
+        {"user_id": log.user_id, "food": log.food, "calories": log.calories, "date": log.date or today}
+        for _, log in valid
+    ]
+    ids = await run_db(db, save_nutrition_logs_bulk, rows)
+    created = [(index, new_id) for (index, _), new_id in zip(valid, ids)]
+    return finish_results(results, created, time.perf_counter() - started)
+
+def remove_nutrition_log(db: Session, log_id: int):
+    db_log = db.get(NutritionLogDB, log_id)
+    if db_log is None:
+        raise HTTPException(status_code=404, detail="Nutrition log not found")
+    record_nutrition(db, [{"user_id": db_log.user_id, "date": db_log.date, "calories": db_log.calories}], sign=-1)
+    db.delete(db_log)
+    db.commit()
+
+@router.delete("/{log_id}", summary="Delete Nutrition Log")
+async def delete_nutrition_log(log_id: int, db: Session = Depends(get_db)) -> dict:
+    """ Delete a nutrition log and take it out of its day's summary """
+    await run_db(db, remove_nutrition_log, log_id)
+    return {"message": "Nutrition log deleted successfully"}
+
+def query_nutrition_logs(db: Session, user_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """ Nutrition logs for a user in id order, optionally within an inclusive date range (served by ix_nutrition_logs_user_id_date) """
+    query = db.query(NutritionLogDB).filter(NutritionLogDB.user_id == user_id)
+    if date_from is not None:
+        query = query.filter(NutritionLogDB.date >= date_from)
+    if date_to is not None:
+        query = query.filter(NutritionLogDB.date <= date_to)
+    return query.order_by(NutritionLogDB.id)
+
+def list_nutrition_logs(
+    db: Session,
+    user_id: int,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> dict:
+    query = query_nutrition_logs(db, user_id, date_from, date_to).with_entities(
+        NutritionLogDB.id, NutritionLogDB.food, NutritionLogDB.calories, NutritionLogDB.date
+    )
+
+    if limit is None and cursor is None:
+        logs = query.all()
+        if not logs:
+            raise HTTPException(status_code=404, detail="No nutrition logs found for this user")
+        return {"user_id": user_id, "logs": [log._asdict() for log in logs]}
+
+    # Keyset pagination on id (dates can be NULL on old rows): without a date range every
+    # page is a range scan of ix_nutrition_logs_user_id_id that stops after the page, however deep
+    page_size = limit or config.DEFAULT_PAGE_SIZE
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, (int,))
+        query = query.filter(NutritionLogDB.id > last_id)
+    logs = query.limit(page_size + 1).all()
+    if not logs and cursor is None:
         raise HTTPException(status_code=404, detail="No nutrition logs found for this user")
+    has_more = len(logs) > page_size
+    logs = logs[:page_size]
     return {
         "user_id": user_id,
-        "logs": [
-            {"id": log.id, "food": log.food, "calories": log.calories} for log in logs
-        ],
-    }
\ No newline at end of file
+        "logs": [log._asdict() for log in logs],
+        "next_cursor": encode_cursor(logs[-1].id) if has_more else None,
+    }
+
+@router.get("/{user_id}", response_model=NutritionLogsResponse, response_model_exclude_unset=True, summary="Get Nutrition Logs")
+async def get_nutrition_logs(
+    user_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="Start of the date range (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="End of the date range (inclusive)"),
+    limit: Optional[int] = Query(None, ge=1, le=config.MAX_PAGE_SIZE, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_read_db)
+) -> dict:
+    return await run_db(db, list_nutrition_logs, user_id, date_from, date_to, limit, cursor)
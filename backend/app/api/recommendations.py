@@ -1,9 +1,66 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from app.core.bulk import validate_items
+from app.core.config import config
+
+if TYPE_CHECKING:
+    import numpy as np
 
 router = APIRouter()
 
-@router.get("", summary="Get Recommended Calories", tags=["Utilities"])
+ACTIVITY_MULTIPLIERS = {"low": 1.2, "medium": 1.55, "high": 1.9}
+GENDER_OFFSETS = {"male": 5, "female": -161}  # Mifflin-St Jeor constant per gender
+TARGET_ADJUSTMENTS = {"muscle gain": 150, "weight loss": -200}  # Maintenance (or anything else) stays the same
+
+class CalorieProfile(BaseModel):
+    age: int
+    weight: float
+    height: float
+    gender: str
+    activity_level: str
+    target: Optional[str] = None
+
+class CalorieRecommendation(BaseModel):
+    recommended_calories: float
+    target: str
+
+def normalize_profile(age, weight, height, gender: str, activity_level: str, target: Optional[str]) -> Tuple:
+    """
+    Canonical form of a profile (numbers as floats, lower-cased labels), used as the memo key.
+    """
+    gender = gender.strip().lower()
+    activity_level = activity_level.strip().lower()
+    if activity_level not in ACTIVITY_MULTIPLIERS:
+        raise ValueError("Invalid activity level.")
+    if gender not in GENDER_OFFSETS:
+        raise ValueError("Invalid gender.")
+    target = target.strip().lower() if target else None
+    return float(age), float(weight), float(height), gender, activity_level, target
+
+@lru_cache(maxsize=config.CALORIE_CACHE_SIZE)
+def calculate_calories(age: float, weight: float, height: float, gender: str, activity_level: str, target: Optional[str]) -> float:
+    """
+    Daily calories for one normalized profile: Mifflin-St Jeor BMR x activity, adjusted for the target.
+    """
+    bmr = 10 * weight + 6.25 * height - 5 * age + GENDER_OFFSETS[gender]
+    total_calories = bmr * ACTIVITY_MULTIPLIERS[activity_level] + TARGET_ADJUSTMENTS.get(target, 0)
+    return round(total_calories, 2)
+
+def calculate_calories_batch(profiles: List[Tuple]) -> "np.ndarray":
+    """
+    calculate_calories over many normalized profiles in one vectorized pass.
+    """
+    import numpy as np  # Only batch requests need it, so it stays out of startup
+    age, weight, height = np.array([profile[:3] for profile in profiles], dtype=float).T
+    offsets = np.array([GENDER_OFFSETS[profile[3]] for profile in profiles], dtype=float)
+    multipliers = np.array([ACTIVITY_MULTIPLIERS[profile[4]] for profile in profiles], dtype=float)
+    adjustments = np.array([TARGET_ADJUSTMENTS.get(profile[5], 0) for profile in profiles], dtype=float)
+    bmr = 10 * weight + 6.25 * height - 5 * age + offsets
+    return np.round(bmr * multipliers + adjustments, 2)
+
+@router.get("", response_model=CalorieRecommendation, summary="Get Recommended Calories", tags=["Utilities"])
 def recommended_calories(
     age: int = Query(..., description="User's age"),
     weight: float = Query(..., description="User's weight in kg"),
@@ -13,32 +70,34 @@ def recommended_calories(
     target: Optional[str] = Query(None, description="User's fitness target (e.g., weight loss, muscle gain)")
 ):
     try:
-        activity_level_mapping = {"low": 1.2, "medium": 1.55, "high": 1.9}
-        if activity_level.lower() not in activity_level_mapping:
-            raise HTTPException(status_code=400, detail="Invalid activity level.")
-        if gender.lower() not in ["male", "female"]:
-            raise HTTPException(status_code=400, detail="Invalid gender.")
-        
-        # Calculate BMR (Basal Metabolic Rate)
-        bmr = (
-            (10 * weight + 6.25 * height - 5 * age + 5)
-            if gender.lower() == "male"
-            else (10 * weight + 6.25 * height - 5 * age - 161)
-        )
-        total_calories = bmr * activity_level_mapping[activity_level.lower()]
-        
-        # Adjust calorie intake based on the target fitness goal
-        if target:
-            target = target.lower()
-            if target == "muscle gain":
-                total_calories += 150  # Increase for muscle gain
-            elif target == "weight loss":
-                total_calories -= 200  # Decrease for weight loss
-            # Maintenance stays the same
-
-        return {
-            "recommended_calories": round(total_calories, 2),
-            "target": target if target else "No specific target provided"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
\ No newline at end of file
+        profile = normalize_profile(age, weight, height, gender, activity_level, target)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "recommended_calories": calculate_calories(*profile),
+        "target": profile[5] if profile[5] else "No specific target provided"
+    }
+
+@router.post("/batch", summary="Get Recommended Calories in Bulk", tags=["Utilities"])
+def recommended_calories_batch(profiles: List[Dict[str, Any]]):
+    """ Recommendations for many profiles at once; invalid profiles are reported per item """
+    valid, results = validate_items(profiles, CalorieProfile)
+    normalized = []
+    for index, profile in valid:
+        try:
+            normalized.append((index, normalize_profile(
+                profile.age, profile.weight, profile.height, profile.gender, profile.activity_level, profile.target
+            )))
+        except ValueError as e:
+            results[index] = {"index": index, "status": "invalid", "errors": [{"msg": str(e)}]}
+
+    if normalized:
+        calories = calculate_calories_batch([profile for _, profile in normalized])
+        for (index, profile), value in zip(normalized, calories.tolist()):
+            results[index] = {
+                "index": index,
+                "status": "ok",
+                "recommended_calories": value,
+                "target": profile[5] if profile[5] else "No specific target provided",
+            }
+    return {"computed": len(normalized), "failed": len(results) - len(normalized), "results": results}
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+from app.database import get_read_db, run_db
+from app.models import DailySummaryDB
+from app.rollups import query_summaries
+
+router = APIRouter()
+
+class DailySummaryOut(BaseModel):
+    date: date
+    total_calories: int
+    nutrition_entries: int
+    workout_minutes: int
+    workout_sessions: int
+
+class DailySummariesResponse(BaseModel):
+    user_id: int
+    days: List[DailySummaryOut]
+
+def list_summaries(db: Session, user_id: int, date_from: Optional[date], date_to: Optional[date]) -> list:
+    query = query_summaries(db, user_id, date_from, date_to).with_entities(
+        DailySummaryDB.date,
+        DailySummaryDB.total_calories,
+        DailySummaryDB.nutrition_entries,
+        DailySummaryDB.workout_minutes,
+        DailySummaryDB.workout_sessions,
+    )
+    return [row._asdict() for row in query]
+
+@router.get("/{user_id}", response_model=DailySummariesResponse, summary="Get Daily Summaries")
+async def get_daily_summaries(
+    user_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="Start of the date range (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="End of the date range (inclusive)"),
+    db: Session = Depends(get_read_db)
+):
+    """ Per-day calorie and workout totals for a user; days without any entries are omitted """
+    return {
+        "user_id": user_id,
+        "days": await run_db(db, list_summaries, user_id, date_from, date_to),
+    }
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-import os
+from fastapi import APIRouter, HTTPException, Request
+from functools import lru_cache
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from app.core.config import config
+from app.core.file_cache import asset_response, load_assets
 
 router = APIRouter()
 
@@ -12,24 +15,53 @@ PDF_PATHS = {
     "home_workout": "files/home_workout.pdf"
 }
 
-@router.get("", tags=["Training Programs"])
+class ProgramInfo(BaseModel):
+    size: int
+    sha256: str
+    etag: str
+    version: str
+    url: str
+
+class TrainingProgramsResponse(BaseModel):
+    available_programs: List[str]
+    programs: Dict[str, ProgramInfo]
+
+# A versioned URL always refers to the same bytes, so it can be cached for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@lru_cache(maxsize=1)
+def program_assets():
+    """
+    Hash (and cache, per PDF_CACHE_MODE) the PDFs once; warmed at startup by app.main.
+    """
+    return load_assets(PDF_PATHS, config.PDF_CACHE_MODE)
+
+@router.get("", response_model=TrainingProgramsResponse, tags=["Training Programs"])
 async def get_training_programs():
     """
-    Get a list of available training programs.
+    Get a list of available training programs, with size and hash so clients can skip downloads they already have.
     """
-    return {"available_programs": list(PDF_PATHS.keys())}
+    assets = program_assets()
+    return {
+        "available_programs": list(PDF_PATHS.keys()),
+        "programs": {
+            goal: {**asset.metadata(), "url": f"/training-programs/{goal}?v={asset.version}"}
+            for goal, asset in assets.items()
+        },
+    }
 
 @router.get("/{goal}", tags=["Training Programs"])
-def download_training_program(goal: str):
+def download_training_program(goal: str, request: Request, v: Optional[str] = None):
     """
     Download the specified training program as a PDF.
     """
-    file_path = PDF_PATHS.get(goal)
-    if not file_path or not os.path.exists(file_path):
+    asset = program_assets().get(goal)
+    if asset is None:
         raise HTTPException(status_code=404, detail="Training program not found")
     
     # Explicitly set the `Content-Disposition` header without quotes
     headers = {
         "Content-Disposition": f"attachment; filename={goal}.pdf",
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if v == asset.version else f"public, max-age={config.PDF_MAX_AGE_SECONDS}",
     }
-    return FileResponse(file_path, media_type="application/pdf", headers=headers)
\ No newline at end of file
+    return asset_response(asset, request, "application/pdf", headers)
@@ -1,14 +1,31 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
-from app.database import get_db
+from pydantic import BaseModel
+from typing import Optional
+from app.database import get_read_db, run_db
 from app.models import UserDB
-from app.api.auth import get_current_user
+from app.api.auth import UserProfile, get_current_user
 
 router = APIRouter()
 
-@router.get("/{user_id}", summary="Get User")
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = db.query(UserDB).filter(UserDB.id == user_id).first()
+class UserOut(UserProfile):
+    email: Optional[str] = None
+
+class UserResponse(BaseModel):
+    user: UserOut
+
+def get_user_by_id(db: Session, user_id: int):
+    # Only the public columns; the password hash is never loaded
+    row = (
+        db.query(UserDB.id, UserDB.username, UserDB.name, UserDB.age, UserDB.gender, UserDB.height, UserDB.weight, UserDB.email)
+        .filter(UserDB.id == user_id)
+        .first()
+    )
+    return row._asdict() if row else None
+
+@router.get("/{user_id}", response_model=UserResponse, summary="Get User")
+async def get_user(user_id: int, db: Session = Depends(get_read_db)):
+    db_user = await run_db(db, get_user_by_id, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"user": db_user}
\ No newline at end of file
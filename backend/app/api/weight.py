@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date
-from app.database import get_db
+from typing import Any, Dict, List, Optional
+import time
+from app.core.bulk import validate_items, bulk_insert, finish_results
+from app.core.config import config
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.trends import TrendState, trend_cache
+from app.database import get_db, get_read_db, run_db
 from app.models import WeightLogDB, UserDB
 
 router = APIRouter()
@@ -12,9 +19,32 @@ class WeightLogRequest(BaseModel):
     weight: float
     date: date
 
-@router.post("")
-def add_weight_log(weight_log: WeightLogRequest, db: Session = Depends(get_db)):
-    """ Adds a new weight entry to the database """
+class WeightLogOut(BaseModel):
+    id: int
+    user_id: int
+    weight: float
+    date: date
+
+class WeightLogsResponse(BaseModel):
+    logs: List[WeightLogOut]
+    next_cursor: Optional[str] = None  # Only present on paginated requests
+
+class TrendPoint(BaseModel):
+    date: date
+    weight: float
+    moving_average: float
+    trend: float
+
+class WeightTrendResponse(BaseModel):
+    user_id: int
+    points: List[TrendPoint]
+    current_trend: float
+    slope_kg_per_day: Optional[float] = None
+    slope_kg_per_week: Optional[float] = None
+    target: Optional[float] = None
+    projected_date: Optional[date] = None
+
+def save_weight_log(db: Session, weight_log: WeightLogRequest):
     user = db.query(UserDB).filter(UserDB.id == weight_log.user_id).first()  
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -23,12 +53,138 @@ def add_weight_log(weight_log: WeightLogRequest, db: Session = Depends(get_db)):
     db.add(new_weight_log)
     db.commit()
     db.refresh(new_weight_log)
+    trend_cache.record(weight_log.user_id, new_weight_log.id, weight_log.date, weight_log.weight)
+
+@router.post("")
+async def add_weight_log(weight_log: WeightLogRequest, db: Session = Depends(get_db)):
+    """ Adds a new weight entry to the database """
+    await run_db(db, save_weight_log, weight_log)
     return {"message": "Weight log added successfully"}
 
-@router.get("/{user_id}")
-def get_weight_logs(user_id: int, db: Session = Depends(get_db)):
-    """ Retrieves all weight logs for a user """
-    logs = db.query(WeightLogDB).filter(WeightLogDB.user_id == user_id).order_by(WeightLogDB.date).all()
-    if not logs:
+def save_weight_logs_bulk(db: Session, valid: list, results: List[dict]) -> list:
+    # One lookup for every referenced user instead of one per entry
+    user_ids = {log.user_id for _, log in valid}
+    known_users = {row.id for row in db.query(UserDB.id).filter(UserDB.id.in_(user_ids))} if user_ids else set()
+    accepted = []
+    for index, log in valid:
+        if log.user_id in known_users:
+            accepted.append((index, log))
+        else:
+            results[index] = {"index": index, "status": "invalid", "errors": [{"msg": "User not found"}]}
+
+    rows = [{"user_id": log.user_id, "weight": log.weight, "date": log.date} for _, log in accepted]
+    try:
+        ids = bulk_insert(db, WeightLogDB, rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+    for row, new_id in zip(rows, ids):
+        if new_id is None:
+            trend_cache.invalidate(row["user_id"])
+        else:
+            trend_cache.record(row["user_id"], new_id, row["date"], row["weight"])
+    return [(index, new_id) for (index, _), new_id in zip(accepted, ids)]
+
+@router.post("/bulk")
+async def add_weight_logs_bulk(entries: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """ Adds many weight entries in one transaction (e.g. a client syncing after being offline) """
+    started = time.perf_counter()
+    valid, results = validate_items(entries, WeightLogRequest)
+    created = await run_db(db, save_weight_logs_bulk, valid, results)
+    return finish_results(results, created, time.perf_counter() - started)
+
+def query_weight_logs(db: Session, user_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """ Weight logs for a user within an inclusive date range (served by ix_weight_logs_user_id_date) """
+    query = db.query(WeightLogDB).filter(WeightLogDB.user_id == user_id)
+    if date_from is not None:
+        query = query.filter(WeightLogDB.date >= date_from)
+    if date_to is not None:
+        query = query.filter(WeightLogDB.date <= date_to)
+    return query.order_by(WeightLogDB.date, WeightLogDB.id)
+
+def list_weight_logs(
+    db: Session,
+    user_id: int,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> dict:
+    query = query_weight_logs(db, user_id, date_from, date_to).with_entities(
+        WeightLogDB.id, WeightLogDB.user_id, WeightLogDB.weight, WeightLogDB.date
+    )
+
+    if limit is None and cursor is None:
+        logs = query.all()
+        if not logs:
+            raise HTTPException(status_code=404, detail="No weight logs found")
+        return {"logs": [log._asdict() for log in logs]}
+
+    # Keyset pagination on (date, id): every page is an index range scan, however deep
+    page_size = limit or config.DEFAULT_PAGE_SIZE
+    if cursor is not None:
+        last_date, last_id = decode_cursor(cursor, (date, int))
+        query = query.filter(tuple_(WeightLogDB.date, WeightLogDB.id) > tuple_(last_date, last_id))
+    logs = query.limit(page_size + 1).all()
+    if not logs and cursor is None:
         raise HTTPException(status_code=404, detail="No weight logs found")
-    return {"logs": logs}
\ No newline at end of file
+    has_more = len(logs) > page_size
+    logs = logs[:page_size]
+    return {
+        "logs": [log._asdict() for log in logs],
+        "next_cursor": encode_cursor(logs[-1].date, logs[-1].id) if has_more else None,
+    }
+
+@router.get("/{user_id}", response_model=WeightLogsResponse, response_model_exclude_unset=True)
+async def get_weight_logs(
+    user_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="Start of the date range (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="End of the date range (inclusive)"),
+    limit: Optional[int] = Query(None, ge=1, le=config.MAX_PAGE_SIZE, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """ Retrieves weight logs for a user, ordered by date (paginated when limit or cursor is given) """
+    return await run_db(db, list_weight_logs, user_id, date_from, date_to, limit, cursor)
+
+def weight_trend(db: Session, user_id: int, target: Optional[float]) -> dict:
+    # (count, max id) is an index-only lookup that tells whether the cached trend is current
+    count, max_id = (
+        db.query(func.count(WeightLogDB.id), func.max(WeightLogDB.id))
+        .filter(WeightLogDB.user_id == user_id)
+        .one()
+    )
+    if not count:
+        raise HTTPException(status_code=404, detail="No weight logs found")
+    fingerprint = (count, max_id)
+
+    summary = trend_cache.summary(user_id, fingerprint, target)
+    cached = trend_cache.get(user_id) if summary is None else None
+    if cached is not None and max_id > cached.max_id:
+        # Logs written elsewhere (e.g. another worker): fold in just the new rows
+        newer = (
+            query_weight_logs(db, user_id)
+            .filter(WeightLogDB.id > cached.max_id)
+            .with_entities(WeightLogDB.id, WeightLogDB.date, WeightLogDB.weight)
+            .all()
+        )
+        trend_cache.extend(user_id, newer)
+        summary = trend_cache.summary(user_id, fingerprint, target)
+
+    if summary is None:
+        rows = query_weight_logs(db, user_id).with_entities(WeightLogDB.id, WeightLogDB.date, WeightLogDB.weight).all()
+        log_ids, days, weights = zip(*rows)
+        state = TrendState(log_ids, days, weights, config.TREND_WINDOW, config.TREND_ALPHA)
+        summary = state.summary(target)
+        trend_cache.set(user_id, state)
+    return {"user_id": user_id, **summary}
+
+@router.get("/{user_id}/trend", response_model=WeightTrendResponse)
+async def get_weight_trend(
+    user_id: int,
+    target: Optional[float] = Query(None, gt=0, description="Target weight in kg for the projected date"),
+    db: Session = Depends(get_read_db)
+):
+    """ Moving average, EWMA trend, fitted slope and target projection for a user's weight series """
+    return await run_db(db, weight_trend, user_id, target)
@@ -2,9 +2,12 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date
-from typing import List, Dict, Any
-from app.database import get_db
+from typing import List, Dict, Any, Optional
+import time
+from app.core.bulk import validate_items, bulk_insert, finish_results
+from app.database import get_db, get_read_db, run_db
 from app.models import WorkoutDB
+from app.rollups import record_workouts
 
 router = APIRouter()
 
@@ -14,56 +17,121 @@ class Workout(BaseModel):
     duration: int
     date: date
 
+class WorkoutOut(BaseModel):
+    id: int
+    exercise: str
+    duration: int
+    date: date
+
+class WorkoutsResponse(BaseModel):
+    user_id: int
+    workouts: List[WorkoutOut]
+
+def save_workout(db: Session, workout: Workout) -> dict:
+    db_workout = WorkoutDB(
+        user_id=workout.user_id,
+        exercise=workout.exercise,
+        duration=workout.duration,
+        date=workout.date  # Ensure we save the workout with the correct date
+    )
+    db.add(db_workout)
+    record_workouts(db, [{"user_id": workout.user_id, "date": workout.date, "duration": workout.duration}])
+    db.commit()
+    db.refresh(db_workout)
+    return {
+        "id": db_workout.id,
+        "user_id": db_workout.user_id,
+        "exercise": db_workout.exercise,
+        "duration": db_workout.duration,
+        "date": db_workout.date
+    }
+
 @router.post("", summary="Add Workout")
-def add_workout(workout: Workout, db: Session = Depends(get_db)): 
+async def add_workout(workout: Workout, db: Session = Depends(get_db)): 
     """ Save workout to database """
     try:
         if not workout.date:
             raise HTTPException(status_code=400, detail="Date is required")
 
-        db_workout = WorkoutDB(
-            user_id=workout.user_id,
-            exercise=workout.exercise,
-            duration=workout.duration,
-            date=workout.date  # Ensure we save the workout with the correct date
-        )
-        db.add(db_workout)
-        db.commit()
-        db.refresh(db_workout)
-
         return {
             "message": "Workout added successfully",
-            "workout": {
-                "id": db_workout.id,
-                "user_id": db_workout.user_id,
-                "exercise": db_workout.exercise,
-                "duration": db_workout.duration,
-                "date": db_workout.date
-            }
+            "workout": await run_db(db, save_workout, workout)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@router.get("/{user_id}", summary="Get Workouts")
-def get_workouts(user_id: int, date: str = Query(..., description="Date in YYYY-MM-DD format"), db: Session = Depends(get_db)):
-    """ Get workouts for a specific user and date """
+def save_workouts_bulk(db: Session, rows: List[dict]) -> list:
     try:
-        if not date:
-            raise HTTPException(status_code=400, detail="Date is required")
+        ids = bulk_insert(db, WorkoutDB, rows)
+        record_workouts(db, rows)
+        db.commit()
+        return ids
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@router.post("/bulk", summary="Add Workouts in Bulk")
+async def add_workouts_bulk(entries: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """ Save many workouts in one transaction (e.g. a client syncing after being offline) """
+    started = time.perf_counter()
+    valid, results = validate_items(entries, Workout)
+    rows = [
+        {"user_id": w.user_id, "exercise": w.exercise, "duration": w.duration, "date": w.date}
+        for _, w in valid
+    ]
+    ids = await run_db(db, save_workouts_bulk, rows)
+    created = [(index, new_id) for (index, _), new_id in zip(valid, ids)]
+    return finish_results(results, created, time.perf_counter() - started)
 
-        workouts = db.query(WorkoutDB).filter(
-            WorkoutDB.user_id == user_id,
-            WorkoutDB.date == date
-        ).all()
+def remove_workout(db: Session, workout_id: int):
+    workout = db.get(WorkoutDB, workout_id)
+    if workout is None:
+        raise HTTPException(status_code=404, detail="Workout not found")
+    record_workouts(db, [{"user_id": workout.user_id, "date": workout.date, "duration": workout.duration}], sign=-1)
+    db.delete(workout)
+    db.commit()
 
-        if workouts is None:
-            return {"workouts": []}  # Always return an array
+@router.delete("/{workout_id}", summary="Delete Workout")
+async def delete_workout(workout_id: int, db: Session = Depends(get_db)):
+    """ Delete a workout and take it out of its day's summary """
+    await run_db(db, remove_workout, workout_id)
+    return {"message": "Workout deleted successfully"}
+
+def query_workouts(db: Session, user_id: int, date_from: Optional[date], date_to: Optional[date]):
+    """ Workouts for a user within an inclusive date range (served by ix_workouts_user_id_date) """
+    query = db.query(WorkoutDB).filter(WorkoutDB.user_id == user_id)
+    if date_from is not None:
+        query = query.filter(WorkoutDB.date >= date_from)
+    if date_to is not None:
+        query = query.filter(WorkoutDB.date <= date_to)
+    return query.order_by(WorkoutDB.date, WorkoutDB.id)
+
+def list_workouts(db: Session, user_id: int, date_from: Optional[date], date_to: Optional[date]) -> list:
+    query = query_workouts(db, user_id, date_from, date_to).with_entities(
+        WorkoutDB.id, WorkoutDB.exercise, WorkoutDB.duration, WorkoutDB.date
+    )
+    return [row._asdict() for row in query]
+
+@router.get("/{user_id}", response_model=WorkoutsResponse, summary="Get Workouts")
+async def get_workouts(
+    user_id: int,
+    date: Optional[date] = Query(None, description="Date in YYYY-MM-DD format"),
+    date_from: Optional[date] = Query(None, alias="from", description="Start of the date range (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="End of the date range (inclusive)"),
+    db: Session = Depends(get_read_db)
+):
+    """ Get workouts for a specific user on one date or within a date range """
+    try:
+        if date is None and date_from is None and date_to is None:
+            raise HTTPException(status_code=400, detail="Date or date range is required")
+        if date is not None:
+            date_from = date_to = date
 
         return {
             "user_id": user_id,
-            "workouts": [
-                {"id": w.id, "exercise": w.exercise, "duration": w.duration, "date": w.date} for w in workouts
-            ],
+            "workouts": await run_db(db, list_workouts, user_id, date_from, date_to),
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
\ No newline at end of file
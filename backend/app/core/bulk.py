@@ -0,0 +1,77 @@
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import Any, List, Optional, Tuple, Type
+from app.core.config import config
+
+def validate_items(items: List[Any], model: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[dict]]:
+    """
+    Validate every entry of a bulk request against a Pydantic model
+    
+    Args:
+        items: The raw entries from the request body
+        model: The Pydantic model each entry must satisfy
+        
+    Returns:
+        tuple: (index, parsed entry) pairs for valid entries, and one result
+        dict per entry where invalid ones are already marked as such
+        
+    Raises:
+        HTTPException: If the batch is larger than BULK_MAX_ITEMS
+    """
+    if len(items) > config.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {config.BULK_MAX_ITEMS} entries per request")
+    valid = []
+    results = []
+    for index, item in enumerate(items):
+        try:
+            parsed = model.model_validate(item)
+        except ValidationError as e:
+            results.append({"index": index, "status": "invalid", "errors": e.errors(include_url=False, include_context=False)})
+            continue
+        valid.append((index, parsed))
+        results.append({"index": index, "status": "pending"})
+    return valid, results
+
+def bulk_insert(db: Session, table_model, rows: List[dict]) -> List[Optional[int]]:
+    """
+    Insert rows with batched multi-row INSERT statements (no commit)
+    
+    Args:
+        db: Database session (the caller commits)
+        table_model: ORM model to insert into
+        rows: Column dicts, one per row
+        
+    Returns:
+        list: The new primary keys in row order, or None for each row when the
+        backend can't return them from an executemany (e.g. MySQL)
+    """
+    if not rows:
+        return []
+    dialect = db.get_bind().dialect
+    if dialect.name == "sqlite":
+        # SQLAlchemy can't guarantee RETURNING order on SQLite, so asking for
+        # sort_by_parameter_order degrades to one INSERT per row. Unordered
+        # RETURNING keeps the multi-row batches; rowids are handed out in VALUES
+        # order under the write lock, so the sorted ids line up with the rows.
+        return sorted(db.execute(insert(table_model).returning(table_model.id), rows).scalars())
+    if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+        stmt = insert(table_model).returning(table_model.id, sort_by_parameter_order=True)
+        return list(db.execute(stmt, rows).scalars())
+    db.execute(insert(table_model), rows)
+    return [None] * len(rows)
+
+def finish_results(results: List[dict], created: List[Tuple[int, Optional[int]]], elapsed: float) -> dict:
+    """
+    Build the bulk response from per-entry results and the created (index, id) pairs
+    """
+    for index, new_id in created:
+        results[index] = {"index": index, "status": "created", "id": new_id}
+    created_count = len(created)
+    return {
+        "created": created_count,
+        "failed": len(results) - created_count,
+        "rows_per_second": round(created_count / elapsed, 1) if elapsed > 0 else None,
+        "results": results,
+    }
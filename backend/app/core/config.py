@@ -1,4 +1,3 @@
-import yaml
 import os
 
 # Configuration class for the application
@@ -7,6 +6,7 @@ class Config:
     APP_TITLE = "Fitness and Nutrition Tracking API"
     APP_DESCRIPTION = "A FastAPI backend application for tracking users, workouts, nutrition logs, weight logs, goals, and training programs."
     APP_VERSION = "1.0.0"
+    WELCOME_MESSAGE = "Welcome to the Fitness and Nutrition Tracking API"
     
     # Database configuration
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fitness_tracker.db")
@@ -15,7 +15,83 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+    # Password hashing (bcrypt runs on its own bounded worker pool)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "64"))
+    BCRYPT_RETRY_AFTER_SECONDS = 1
+
+    # Authenticated-principal cache (entries never outlive the token's exp)
+    PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+    PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
     
+    # Keyset pagination for log endpoints
+    DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+    # Bulk ingestion endpoints
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "5000"))
+
+    # Weight trend analytics (moving-average window in entries, EWMA smoothing factor in (0, 1))
+    TREND_WINDOW = int(os.getenv("TREND_WINDOW", "7"))
+    TREND_ALPHA = float(os.getenv("TREND_ALPHA", "0.1"))
+    TREND_CACHE_MAX_USERS = int(os.getenv("TREND_CACHE_MAX_USERS", "1024"))
+
+    # Per-client token-bucket rate limits by route class: burst capacity and refill
+    # rate in requests per second. Clients are the bearer token's user, else the IP
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+    RATE_LIMITS = {
+        "login": {"capacity": 10, "per_second": 10 / 60},
+        "register": {"capacity": 5, "per_second": 1 / 60},
+        "password_reset": {"capacity": 5, "per_second": 1 / 60},
+        "export": {"capacity": 3, "per_second": 1 / 10},
+        "default": {"capacity": 120, "per_second": 20},
+    }
+    # (method, path prefix, route class); first match wins, anything else is "default"
+    RATE_LIMIT_ROUTES = [
+        ("POST", "/login", "login"),
+        ("POST", "/register", "register"),
+        ("POST", "/password-reset-confirm", "password_reset"),
+        ("GET", "/export/", "export"),
+    ]
+    RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+    RATE_LIMIT_IDLE_SECONDS = float(os.getenv("RATE_LIMIT_IDLE_SECONDS", "600"))
+    # Only behind a proxy that sets X-Forwarded-For (otherwise clients can spoof it)
+    RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "0") == "1"
+
+    # Database diagnostics: statements slower than SLOW_QUERY_MS are logged with their
+    # SQL and parameter types; requests running more statements than their route
+    # template's budget, or one statement N_PLUS_ONE_THRESHOLD times, are flagged
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "20"))
+    QUERY_BUDGETS = {
+        "/dashboard": 5,
+        "/summary/{user_id}": 2,
+        "/me": 2,
+    }
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+    # On-demand profiling: a request with "X-Profile: <PROFILING_TOKEN>" gets its
+    # cProfile report instead of its response (disabled while the token is empty)
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+    PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "40"))
+
+    # Memoized single-profile calorie recommendations
+    CALORIE_CACHE_SIZE = int(os.getenv("CALORIE_CACHE_SIZE", "4096"))
+    
+    # Rows fetched (and encoded) per chunk by the streaming export
+    EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+
+    # Training program PDFs: "none" (stream from disk), "memory" or "mmap", and
+    # Cache-Control max-age for unversioned URLs (versioned ones are immutable)
+    PDF_CACHE_MODE = os.getenv("PDF_CACHE_MODE", "memory")
+    PDF_MAX_AGE_SECONDS = int(os.getenv("PDF_MAX_AGE_SECONDS", "86400"))
+
+    # Schema written by `python -m app.openapi` at build time and served from
+    # there instead of being generated on the first docs request
+    OPENAPI_SCHEMA_PATH = os.getenv("OPENAPI_SCHEMA_PATH", "openapi.json")
+
     # CORS settings
     CORS_ORIGINS = [
         "http://localhost:3000",  # React frontend
@@ -31,18 +107,37 @@ class Config:
     }
     
     def __init__(self):
+        self.load_yaml("config.yaml")
+        self.validate()
+
+    def load_yaml(self, path: str):
         # Load configuration from YAML file
         try:
-            with open("config.yaml", "r") as file:
-                yaml_config = yaml.safe_load(file)
-                if yaml_config:
-                    # Update class attributes with values from config file
-                    for key, value in yaml_config.items():
-                        if hasattr(self, key.upper()):
-                            setattr(self, key.upper(), value)
+            file = open(path, "r")
         except FileNotFoundError:
-            # If config file not found, use default welcome message
-            pass
+            # If config file not found, keep the defaults
+            return
+        # Only paid for when there is a config file to parse
+        import yaml
+        with file:
+            yaml_config = yaml.safe_load(file)
+        if yaml_config:
+            # Update class attributes with values from config file
+            for key, value in yaml_config.items():
+                if hasattr(self, key.upper()):
+                    setattr(self, key.upper(), value)
+
+    def validate(self):
+        # Settings that would otherwise only fail on the first request that uses them
+        if not 0 < self.TREND_ALPHA <= 1:
+            raise ValueError(f"TREND_ALPHA must be in (0, 1], got {self.TREND_ALPHA}")
+        if self.TREND_WINDOW < 1:
+            raise ValueError(f"TREND_WINDOW must be at least 1, got {self.TREND_WINDOW}")
+        for name, limit in self.RATE_LIMITS.items():
+            if limit["per_second"] <= 0:
+                raise ValueError(f"RATE_LIMITS[{name!r}] per_second must be positive, got {limit['per_second']}")
+        if self.RATE_LIMIT_MAX_CLIENTS < 1:
+            raise ValueError(f"RATE_LIMIT_MAX_CLIENTS must be at least 1, got {self.RATE_LIMIT_MAX_CLIENTS}")
 
 # Create a config instance
 config = Config()
\ No newline at end of file
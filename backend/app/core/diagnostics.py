@@ -0,0 +1,147 @@
+"""
+Database and request diagnostics: slow-query log and on-demand profiling.
+
+Statements slower than config.SLOW_QUERY_MS are logged (logger "app.db.slow")
+with their SQL and the shape of their bound parameters (types and row counts,
+never values). The engine events in app.database call log_slow_query, so every
+router and session is covered.
+
+A single request can be profiled by sending the X-Profile header with
+config.PROFILING_TOKEN. The response is then replaced by the cProfile report:
+plain text sorted by cumulative time, or the raw pstats dump with
+"X-Profile-Format: pstats" (for snakeviz, flameprof or `python -m pstats`).
+Database work on threadpool threads (run_db) is profiled too and merged into
+the same report. With no token configured the middleware is a pass-through.
+"""
+import cProfile
+import hmac
+import io
+import logging
+import marshal
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from fastapi.responses import JSONResponse, Response
+from app.core.config import config
+
+slow_query_logger = logging.getLogger("app.db.slow")
+
+def parameter_shape(parameters) -> str:
+    """
+    Bound parameters described by type, e.g. "(int, date)" or "500 x {user_id: int, calories: int}"
+    """
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+def log_slow_query(statement: str, parameters, seconds: float):
+    slow_query_logger.warning(
+        "Slow query (%.1f ms): %s | parameters: %s", seconds * 1000, " ".join(statement.split()), parameter_shape(parameters)
+    )
+
+class RequestProfile:
+    """
+    cProfile results of one request, merged from every thread that worked on it
+    """
+
+    def __init__(self):
+        self.stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def add(self, profiler: cProfile.Profile):
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar("active_profile", default=None)
+# cProfile can only follow one request at a time on the event loop thread
+_profiling_lock = threading.Lock()
+
+def profile_in_thread(func):
+    """
+    func, wrapped to profile its run on a worker thread when the current request is being profiled
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        return func
+
+    def run(*args):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args)
+        finally:
+            profiler.disable()
+            profile.add(profiler)
+    return run
+
+def profile_report(profile: RequestProfile, title: str) -> str:
+    buffer = io.StringIO()
+    buffer.write(title + "\n")
+    profile.stats.stream = buffer
+    profile.stats.sort_stats("cumulative").print_stats(config.PROFILE_TOP_FUNCTIONS)
+    return buffer.getvalue()
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles requests carrying a valid X-Profile token
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.PROFILING_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        token = headers.get(b"x-profile")
+        if token is None or not hmac.compare_digest(token, config.PROFILING_TOKEN.encode()):
+            await self.app(scope, receive, send)
+            return
+        if not _profiling_lock.acquire(blocking=False):
+            await JSONResponse({"detail": "Another request is being profiled"}, status_code=409)(scope, receive, send)
+            return
+
+        status = 500
+        async def capture(message):
+            # The profiled response is discarded; only its status is reported
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profile = RequestProfile()
+        context_token = _active_profile.set(profile)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                profiler.disable()
+        finally:
+            _active_profile.reset(context_token)
+            _profiling_lock.release()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        profile.add(profiler)
+
+        response_headers = {"X-Profiled-Status": str(status), "X-Profiled-Duration-Ms": f"{elapsed_ms:.1f}"}
+        if headers.get(b"x-profile-format") == b"pstats":
+            response = Response(
+                marshal.dumps(profile.stats.stats),
+                media_type="application/octet-stream",
+                headers={**response_headers, "Content-Disposition": 'attachment; filename="request.prof"'},
+            )
+        else:
+            title = f"Profile of {scope['method']} {scope['path']} -> {status} in {elapsed_ms:.1f} ms"
+            response = Response(profile_report(profile, title), media_type="text/plain", headers=response_headers)
+        await response(scope, receive, send)
@@ -0,0 +1,137 @@
+"""
+Static downloads with content-hash ETags.
+
+Each file is hashed once when it is loaded, and its bytes can be kept in
+memory or memory-mapped, so repeat downloads neither re-read the file nor
+re-send it to clients that already have it (If-None-Match -> 304). Byte
+ranges are supported for resumed downloads.
+"""
+import hashlib
+import mmap
+import os
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+HASH_CHUNK_SIZE = 1024 * 1024
+CACHE_MODES = ("none", "memory", "mmap")
+
+class StaticAsset:
+    """
+    A file on disk with precomputed size and SHA-256, and optionally its cached bytes
+
+    Args:
+        path: File to serve
+        cache_mode: "none" streams from disk on every request, "memory" keeps
+            the bytes in the process, "mmap" maps the file read-only and lets
+            the OS page cache hold it
+    """
+
+    def __init__(self, path: str, cache_mode: str = "none"):
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {cache_mode!r}; expected one of {CACHE_MODES}")
+        self.path = path
+        self.cache_mode = cache_mode
+        self.stat = os.stat(path)
+        self.size = self.stat.st_size
+
+        digest = hashlib.sha256()
+        chunks = []
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                if cache_mode == "memory":
+                    chunks.append(chunk)
+            self._data = None
+            if cache_mode == "memory":
+                self._data = b"".join(chunks)
+            elif cache_mode == "mmap" and self.size:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            elif cache_mode == "mmap":
+                self._data = b""  # Empty files can't be mapped
+        self.sha256 = digest.hexdigest()
+        self.etag = f'"{self.sha256}"'
+        # Short content version for cache-busting URLs
+        self.version = self.sha256[:16]
+
+    def metadata(self) -> dict:
+        return {"size": self.size, "sha256": self.sha256, "etag": self.etag, "version": self.version}
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> bytes:
+        """
+        Bytes start..end (inclusive) from the cache
+        """
+        end = self.size - 1 if end is None else end
+        return bytes(self._data[start:end + 1])
+
+    @property
+    def cached(self) -> bool:
+        return self._data is not None
+
+def load_assets(paths: Dict[str, str], cache_mode: str = "none") -> Dict[str, StaticAsset]:
+    """
+    Hash (and optionally cache) every file that exists; missing ones are skipped.
+    """
+    return {name: StaticAsset(path, cache_mode) for name, path in paths.items() if os.path.isfile(path)}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The (start, end) of a single "bytes=" range, inclusive
+
+    Returns None when the header should be ignored (malformed, another unit,
+    or several ranges) and the full body served instead.
+
+    Raises:
+        ValueError: If the range can't be satisfied for a body of this size
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = (part.strip() for part in spec.strip().partition("-"))
+    if not dash or not (first.isdigit() or first == "") or not (last.isdigit() or last == "") or first == last == "":
+        return None
+    if first == "":
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and start > end:
+        return None
+    if start >= size:
+        raise ValueError("Range starts past the end")
+    return start, min(end, size - 1)
+
+def asset_response(asset: StaticAsset, request: Request, media_type: str, headers: Dict[str, str]) -> Response:
+    """
+    Serve an asset honoring If-None-Match, Range and If-Range
+    """
+    headers = {**headers, "ETag": asset.etag, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+    if not asset.cached:
+        # Starlette streams the file and handles Range/If-Range against our ETag
+        return FileResponse(asset.path, media_type=media_type, headers=headers, stat_result=asset.stat)
+
+    http_range = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if http_range and (if_range is None or if_range.strip() == asset.etag):
+        try:
+            byte_range = parse_byte_range(http_range, asset.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{asset.size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{asset.size}"
+            return Response(asset.read(start, end), status_code=206, media_type=media_type, headers=headers)
+    return Response(asset.read(), media_type=media_type, headers=headers)
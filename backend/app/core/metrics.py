@@ -0,0 +1,235 @@
+"""
+Request and database metrics in the Prometheus text format.
+
+MetricsMiddleware times every HTTP request and records it under its route
+template (e.g. /workouts/{user_id}, never the raw path) and status code, and
+keeps an in-flight gauge. SQLAlchemy engine events (see
+app.database.record_query_metrics) report each statement's duration here; the
+statements a request runs are added up through a context variable, which
+follows the request into threadpool and run_sync calls, giving per-request
+query counts and database time per route. Requests that run more statements
+than their route's budget (config.QUERY_BUDGETS, else config.QUERY_BUDGET), or
+the same statement config.N_PLUS_ONE_THRESHOLD times or more (the signature of
+an N+1 loop), are logged on "app.db.budget" and counted.
+
+Histograms keep plain per-bucket counters and are only made cumulative when
+/metrics is scraped, so recording a sample is a bisect and two additions.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.core.config import config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in series
+        ]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Tuple, value: float):
+        index = bisect_left(self.buckets, value)  # First bucket with le >= value; len(buckets) is +Inf
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = self.header()
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+# A collector returns (name, kind, help, [(labels dict, value)]) tuples, read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, documentation, samples in collector():
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status", ("method", "route", "status")))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ("method", "route")))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Latency of individual SQL statements", (), QUERY_LATENCY_BUCKETS))
+db_query_budget_exceeded = registry.register(Counter(
+    "db_query_budget_exceeded_total", "Requests over their route's query budget or repeating a statement (N+1)",
+    ("method", "route", "reason")))
+
+budget_logger = logging.getLogger("app.db.budget")
+
+class QueryStats:
+    """
+    Statements run on behalf of one request (shared by its threadpool calls)
+    """
+    __slots__ = ("count", "seconds", "statements", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, statement: str):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] = self.statements.get(statement, 0) + 1
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+def record_query(seconds: float, statement: str):
+    """
+    Record one SQL statement's duration (called from the engine events)
+    """
+    db_query_duration.observe((), seconds)
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.add(seconds, statement)
+
+def check_query_budget(method: str, route: str, stats: QueryStats):
+    """
+    Flag a finished request that ran too many statements, or one statement too many times
+    """
+    budget = config.QUERY_BUDGETS.get(route, config.QUERY_BUDGET)
+    if stats.count > budget:
+        db_query_budget_exceeded.inc((method, route, "budget"))
+        budget_logger.warning("%s %s ran %d queries (budget %d)", method, route, stats.count, budget)
+    if stats.statements:
+        statement, repeats = max(stats.statements.items(), key=lambda item: item[1])
+        if repeats >= config.N_PLUS_ONE_THRESHOLD:
+            db_query_budget_exceeded.inc((method, route, "repeated_statement"))
+            budget_logger.warning(
+                "%s %s ran the same query %d times (possible N+1): %s", method, route, repeats, " ".join(statement.split())
+            )
+
+def route_template(scope) -> str:
+    # The router stores the matched route in the scope. Routes of included routers
+    # only know their path within the router; FastAPI records the prefixed one in
+    # its effective route context. Unmatched paths share one label
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(context, "path", None) or getattr(scope.get("route"), "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, in-flight requests and per-request DB work
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = _request_queries.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            _request_queries.reset(token)
+            method, route = scope["method"], route_template(scope)
+            http_request_duration.observe((method, route, str(status)), elapsed)
+            db_queries_per_request.observe((method, route), stats.count)
+            db_time_per_request.observe((method, route), stats.seconds)
+            check_query_budget(method, route, stats)
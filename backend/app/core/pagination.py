@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import date
+from typing import Sequence
+from fastapi import HTTPException
+
+def _parse_key(value, kind: type):
+    # Keyset values come back from JSON: ids as ints, dates as ISO strings
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind is date and isinstance(value, str):
+        return date.fromisoformat(value)
+    raise ValueError(f"expected {kind.__name__}")
+
+def encode_cursor(*values) -> str:
+    """
+    Encode the sort key of the last row on a page as an opaque cursor
+    
+    Args:
+        values: The keyset column values of the last returned row
+        
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, kinds: Sequence[type]) -> list:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: The cursor sent by the client
+        kinds: The type of each keyset value (int or date)
+        
+    Returns:
+        list: The keyset values, dates parsed
+        
+    Raises:
+        HTTPException: If the cursor is malformed or a value has the wrong type
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(kinds):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        return [_parse_key(value, kind) for value, kind in zip(values, kinds)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,177 @@
+"""
+Per-client token-bucket rate limiting.
+
+Every request is mapped to a route class (config.RATE_LIMIT_ROUTES, e.g. "login"
+for POST /login, "default" for everything else) and charged one token from the
+bucket of its client: the authenticated user when the request carries a valid
+bearer token, the client IP otherwise. A request that finds its bucket empty is
+shed with 429 and a Retry-After telling the client when the next token is due,
+before it reaches bcrypt, the database or the router at all.
+
+Buckets live in memory, one OrderedDict per route class in least recently used
+order: a request is a dict lookup plus move_to_end, and buckets that have sat
+idle long enough to refill completely are evicted from the front (forgetting a
+full bucket loses nothing).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from fastapi.responses import JSONResponse
+from app.core.config import config
+
+class TokenBucketStore:
+    """
+    Token buckets for one route class, keyed by client
+
+    Args:
+        capacity: Burst size (tokens in a full bucket)
+        per_second: Refill rate in tokens per second
+        max_clients: Most buckets kept; the least recently used go first
+        idle_seconds: Buckets untouched for this long are dropped (never less
+            than the time a bucket takes to refill, so eviction can't reset a limit)
+    """
+
+    def __init__(self, capacity: float, per_second: float, max_clients: int, idle_seconds: float):
+        if per_second <= 0:
+            raise ValueError(f"per_second must be positive, got {per_second}")
+        if max_clients < 1:
+            raise ValueError(f"max_clients must be at least 1, got {max_clients}")
+        self.capacity = capacity
+        self.per_second = per_second
+        self.max_clients = max_clients
+        self.idle_seconds = max(idle_seconds, capacity / per_second)
+        self._buckets = OrderedDict()  # client -> [tokens, updated_at]
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def acquire(self, client: str, now: Optional[float] = None) -> float:
+        """
+        Take a token for client
+
+        Returns:
+            float: 0 if the request may proceed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.capacity, now]
+            else:
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.per_second)
+                bucket[1] = now
+                self._buckets.move_to_end(client)
+            self._evict(now)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            return (1 - bucket[0]) / self.per_second
+
+    def _evict(self, now: float):
+        # Caller holds the lock. The front is the least recently used bucket, so
+        # this stops at the first one still in use (amortized O(1) per request)
+        while self._buckets:
+            client, (_, updated_at) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_clients and now - updated_at < self.idle_seconds:
+                break
+            del self._buckets[client]
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "per_second": self.per_second,
+                "clients": len(self._buckets),
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "evicted": self.evicted,
+            }
+
+class RateLimiter:
+    """
+    Route classes and their bucket stores
+
+    Args:
+        limits: {route class: {"capacity": ..., "per_second": ...}}; must include "default"
+        routes: (method, path prefix, route class) rules, first match wins
+    """
+
+    def __init__(self, limits: Dict[str, dict], routes: List[Tuple[str, str, str]], max_clients: int, idle_seconds: float):
+        self.routes = routes
+        self.stores = {
+            name: TokenBucketStore(limit["capacity"], limit["per_second"], max_clients, idle_seconds)
+            for name, limit in limits.items()
+        }
+
+    def route_class(self, method: str, path: str) -> str:
+        for rule_method, prefix, name in self.routes:
+            if method == rule_method and path.startswith(prefix):
+                return name
+        return "default"
+
+    def check(self, method: str, path: str, client: str) -> float:
+        """
+        Charge a request to its client's bucket; seconds to wait if it must be shed, else 0
+        """
+        return self.stores[self.route_class(method, path)].acquire(client)
+
+    def stats(self) -> dict:
+        return {"enabled": config.RATE_LIMIT_ENABLED, "classes": {name: store.stats() for name, store in self.stores.items()}}
+
+def client_key(scope) -> str:
+    """
+    The user named by a valid bearer token, or the client's IP address
+    """
+    headers = dict(scope["headers"])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        import jwt  # Deferred like in app.core.security; free once loaded
+        try:
+            username = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM]).get("sub")
+        except jwt.PyJWTError:
+            username = None
+        if username:
+            return f"user:{username}"
+
+    forwarded = headers.get(b"x-forwarded-for") if config.RATE_LIMIT_TRUST_FORWARDED_FOR else None
+    if forwarded:
+        return f"ip:{forwarded.decode('latin-1').split(',')[0].strip()}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware that sheds over-limit requests with 429 and Retry-After
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        retry_after = self.limiter.check(scope["method"], scope["path"], client_key(scope))
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            {"detail": "Too many requests, please retry later"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
+
+# Shared by the middleware and the /rate-limits counters endpoint
+rate_limiter = RateLimiter(
+    config.RATE_LIMITS, config.RATE_LIMIT_ROUTES, config.RATE_LIMIT_MAX_CLIENTS, config.RATE_LIMIT_IDLE_SECONDS
+)
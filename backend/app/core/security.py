@@ -1,17 +1,19 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-import bcrypt
-import jwt
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from app.database import get_db
+from app.core.config import config
+from app.database import get_db, run_db
 from app.models import UserDB
 
-# Constants
-SECRET_KEY = "your_secret_key"  # Should be from config in production
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# bcrypt and PyJWT are imported where they are first used, keeping them out of
+# the API's cold start (the token settings live in config)
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
@@ -27,6 +29,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if password matches, False otherwise
     """
+    import bcrypt
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 def get_password_hash(password: str) -> str:
@@ -39,7 +42,133 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: The hashed password
     """
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    import bcrypt
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=config.BCRYPT_ROUNDS)).decode("utf-8")
+
+# Dedicated pool for bcrypt so hashing never occupies the shared request threadpool
+_password_executor = ThreadPoolExecutor(max_workers=config.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_password_jobs_pending = 0
+_password_jobs_lock = threading.Lock()
+
+def _password_job_done(_future):
+    global _password_jobs_pending
+    with _password_jobs_lock:
+        _password_jobs_pending -= 1
+
+async def run_password_job(func, *args):
+    """
+    Run a bcrypt call on the dedicated password pool
+    
+    Args:
+        func: The blocking hashing function to run
+        *args: Arguments passed to func
+        
+    Returns:
+        The result of func
+        
+    Raises:
+        HTTPException: 503 with Retry-After if the pool's queue is full
+    """
+    global _password_jobs_pending
+    with _password_jobs_lock:
+        if _password_jobs_pending >= config.BCRYPT_WORKERS + config.BCRYPT_MAX_QUEUE:
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": str(config.BCRYPT_RETRY_AFTER_SECONDS)},
+            )
+        _password_jobs_pending += 1
+    # Count the job until the worker finishes it, even if the request is cancelled
+    future = _password_executor.submit(func, *args)
+    future.add_done_callback(_password_job_done)
+    return await asyncio.wrap_future(future)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the dedicated bcrypt pool
+    """
+    return await run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the dedicated bcrypt pool
+    """
+    return await run_password_job(get_password_hash, password)
+
+class PrincipalCache:
+    """
+    Token -> user cache so hot sessions skip JWT decoding and the users lookup
+    
+    Entries expire at the token's exp (or the configured TTL, whichever is first)
+    and hold a detached copy of the user, so they are safe to share between
+    requests and sessions.
+    """
+    
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # token -> (user, expires_at)
+        self._tokens_by_username = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, token: str) -> Optional[UserDB]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user
+    
+    def set(self, token: str, user: UserDB, token_exp: float) -> UserDB:
+        """
+        Cache a detached copy of user for token and return that copy
+        """
+        principal = UserDB(**{column.name: getattr(user, column.name) for column in UserDB.__table__.columns})
+        expires_at = min(token_exp, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_username.setdefault(principal.username, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return principal
+    
+    def invalidate_user(self, username: str):
+        """
+        Drop every cached token for a user (e.g. after a password change)
+        """
+        with self._lock:
+            for token in list(self._tokens_by_username.get(username, ())):
+                self._remove(token)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_username.clear()
+    
+    def _remove(self, token: str):
+        # Caller holds the lock
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        username = entry[0].username
+        tokens = self._tokens_by_username.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_username[username]
+
+# Shared by every copy of the get_current_user dependency
+principal_cache = PrincipalCache(config.PRINCIPAL_CACHE_TTL_SECONDS, config.PRINCIPAL_CACHE_MAX_ENTRIES)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -52,13 +181,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         str: The encoded JWT token
     """
+    import jwt
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_user_by_username(db: Session, username: str):
+    return db.query(UserDB).filter(UserDB.username == username).first()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """
     Get the current authenticated user from the token
     
@@ -72,15 +205,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     Raises:
         HTTPException: If token is invalid or user not found
     """
+    # Hot sessions are served from the shared principal cache without touching the DB
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    import jwt
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
         username = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(UserDB).filter(UserDB.username == username).first()
+        user = await run_db(db, get_user_by_username, username)
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
-        return user
+        return principal_cache.set(token, user, payload["exp"])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.PyJWTError:
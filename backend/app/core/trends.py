@@ -0,0 +1,223 @@
+"""
+Weight trend analytics.
+
+A user's weight series is summarized as a trailing moving average, an
+exponentially weighted trend (EWMA), the slope of a least-squares line and a
+projected date for reaching a target weight. The first computation for a user
+is vectorized with NumPy over the whole series; after that the per-user state is
+cached and each new weight log is folded in incrementally, so the series is
+never recomputed from scratch unless history changes out of order.
+
+NumPy is imported by the functions that use it, on the first trend computed
+rather than when the API starts.
+"""
+import math
+import threading
+from collections import OrderedDict, deque
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+from app.core.config import config
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Largest decay**-k factor used inside one EWMA chunk (keeps the scaled cumsum finite and precise)
+EWMA_MAX_SCALE_LOG = 230.0
+
+def moving_average(weights: "np.ndarray", window: int) -> "np.ndarray":
+    """
+    Trailing mean of up to `window` entries at every point (shorter at the start).
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1, got {window}")
+    import numpy as np
+    sums = np.concatenate(([0.0], np.cumsum(weights)))
+    ends = np.arange(1, len(weights) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+def ewma(weights: "np.ndarray", alpha: float) -> "np.ndarray":
+    """
+    Exponentially weighted moving average seeded with the first weight.
+
+    y[k] = alpha * x[k] + (1 - alpha) * y[k - 1] is unrolled into a scaled
+    cumulative sum. The scale factor (1 - alpha) ** -k grows without bound, so
+    the series is processed in chunks short enough to stay within float range,
+    each chunk seeded with the last value of the previous one.
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError(f"alpha must be in (0, 1], got {alpha}")
+    import numpy as np
+    out = np.empty_like(weights)
+    if len(weights) == 0:
+        return out
+    if alpha >= 1.0:
+        out[:] = weights
+        return out
+    decay = 1.0 - alpha
+    chunk = max(1, int(EWMA_MAX_SCALE_LOG / -math.log(decay)))
+    level = weights[0]
+    for start in range(0, len(weights), chunk):
+        x = weights[start:start + chunk]
+        powers = decay ** np.arange(1, len(x) + 1)
+        out[start:start + len(x)] = powers * (level + alpha * np.cumsum(x / powers))
+        level = out[start + len(x) - 1]
+    return out
+
+class TrendState:
+    """
+    Running trend of one user's weight series
+
+    Keeps the per-point series plus the sufficient statistics for the linear
+    fit (sums of x, y, xy and xx, with x in days since the first log), so a
+    new point only costs O(window).
+    """
+
+    def __init__(self, log_ids: Sequence[int], days: Sequence[date], weights: Sequence[float], window: int, alpha: float):
+        self.window = window
+        self.alpha = alpha
+        self.first_day = days[0]
+        self.count = len(days)
+        self.max_id = max(log_ids)
+        self.last_day = days[-1]
+
+        import numpy as np
+        values = np.asarray(weights, dtype=float)
+        x = np.array([(day - self.first_day).days for day in days], dtype=float)
+        self.sum_x, self.sum_y = float(x.sum()), float(values.sum())
+        self.sum_xy, self.sum_xx = float(x @ values), float(x @ x)
+
+        self.days: List[date] = list(days)
+        self.weights: List[float] = values.tolist()
+        self.moving_average: List[float] = moving_average(values, window).tolist()
+        self.trend: List[float] = ewma(values, alpha).tolist()
+        self._recent = deque(self.weights[-window:], maxlen=window)
+
+    def fingerprint(self) -> Tuple[int, int]:
+        return self.count, self.max_id
+
+    def can_append(self, log_id: int, day: date) -> bool:
+        # Only logs newer than everything seen, and not dated before the last point, keep the order intact
+        return log_id > self.max_id and day >= self.last_day
+
+    def append(self, log_id: int, day: date, weight: float):
+        x = float((day - self.first_day).days)
+        self.count += 1
+        self.max_id = log_id
+        self.last_day = day
+        self.sum_x += x
+        self.sum_y += weight
+        self.sum_xy += x * weight
+        self.sum_xx += x * x
+
+        self._recent.append(weight)
+        self.days.append(day)
+        self.weights.append(weight)
+        self.moving_average.append(sum(self._recent) / len(self._recent))
+        self.trend.append(self.alpha * weight + (1.0 - self.alpha) * self.trend[-1])
+
+    def slope(self) -> Optional[float]:
+        """
+        Least-squares slope in kg per day (None with fewer than two distinct days)
+        """
+        denominator = self.count * self.sum_xx - self.sum_x ** 2
+        if self.count < 2 or denominator <= 0:
+            return None
+        return (self.count * self.sum_xy - self.sum_x * self.sum_y) / denominator
+
+    def projected_date(self, target: float) -> Optional[date]:
+        """
+        When the current trend reaches target at the fitted rate (None if it is heading away)
+        """
+        current = self.trend[-1]
+        if math.isclose(current, target, abs_tol=0.05):
+            return self.last_day
+        slope = self.slope()
+        if not slope or (target - current) / slope < 0:
+            return None
+        return self.last_day + timedelta(days=math.ceil((target - current) / slope))
+
+    def summary(self, target: Optional[float] = None) -> dict:
+        slope = self.slope()
+        return {
+            "points": [
+                {"date": day, "weight": weight, "moving_average": round(average, 3), "trend": round(trend, 3)}
+                for day, weight, average, trend in zip(self.days, self.weights, self.moving_average, self.trend)
+            ],
+            "current_trend": round(self.trend[-1], 3),
+            "slope_kg_per_day": round(slope, 4) if slope is not None else None,
+            "slope_kg_per_week": round(slope * 7, 3) if slope is not None else None,
+            "target": target,
+            "projected_date": self.projected_date(target) if target is not None else None,
+        }
+
+class TrendCache:
+    """
+    Per-user TrendState cache (LRU-bounded)
+
+    Entries are validated against the user's (log count, max log id) on every
+    read, so logs written by another process are caught up incrementally
+    instead of serving a stale trend.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[TrendState]:
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is not None:
+                self._states.move_to_end(user_id)
+            return state
+
+    def set(self, user_id: int, state: TrendState):
+        with self._lock:
+            self._states[user_id] = state
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+
+    def summary(self, user_id: int, fingerprint: Tuple[int, int], target: Optional[float] = None) -> Optional[dict]:
+        """
+        The cached trend for a user, or None when it is missing or behind the database
+        """
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None or state.fingerprint() != fingerprint:
+                return None
+            self._states.move_to_end(user_id)
+            return state.summary(target)
+
+    def extend(self, user_id: int, rows: Sequence[Tuple[int, date, float]]):
+        """
+        Fold (id, date, weight) rows, ordered by date, into the user's cached trend
+        """
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None:
+                return
+            for log_id, day, weight in rows:
+                if not state.can_append(log_id, day):
+                    del self._states[user_id]
+                    return
+                state.append(log_id, day, weight)
+
+    def record(self, user_id: int, log_id: int, day: date, weight: float):
+        """
+        Fold a newly committed weight log into the user's cached trend, if any
+        """
+        # A backdated entry drops the state, so the series is rebuilt on the next read
+        self.extend(user_id, [(log_id, day, weight)])
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._states.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+# Shared by the weight router's write and trend paths
+trend_cache = TrendCache(config.TREND_CACHE_MAX_USERS)
@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import declarative_base
+from starlette.concurrency import run_in_threadpool
+from app.core.config import config
+from app.core.diagnostics import log_slow_query, profile_in_thread
+from app.core.metrics import record_query
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,23 +17,207 @@ load_dotenv()
 # Get DATABASE_URL from environment variable or use default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fitness_tracker.db")
 
-# Create engine with proper settings for SQLite
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+# Reads can go to a replica; by default they use the same database
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", DATABASE_URL)
+
+# Connection pool settings for the writer and reader engines
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+READ_DB_POOL_SIZE = int(os.getenv("READ_DB_POOL_SIZE", "10"))
+READ_DB_MAX_OVERFLOW = int(os.getenv("READ_DB_MAX_OVERFLOW", "20"))
+
+# Drivers that select the async database path (e.g. sqlite+aiosqlite://, postgresql+asyncpg://)
+ASYNC_DRIVERS = {"aiosqlite", "asyncpg", "aiomysql", "asyncmy", "psycopg_async"}
+
+def is_async_url(url: str) -> bool:
+    return make_url(url).get_driver_name() in ASYNC_DRIVERS
+
+def sync_url(url: str) -> str:
+    """
+    The same database with the backend's default sync driver, for migrations and tooling.
+    """
+    parsed = make_url(url)
+    if parsed.get_driver_name() not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=parsed.get_backend_name()).render_as_string(hide_password=False)
+
+def is_memory_sqlite(url: str) -> bool:
+    return sync_url(url) in ("sqlite://", "sqlite:///:memory:")
+
+# Session-level statements that make a server connection read-only
+READ_ONLY_STATEMENTS = {
+    "mysql": "SET SESSION TRANSACTION READ ONLY",
+    "mariadb": "SET SESSION TRANSACTION READ ONLY",
+    "postgresql": "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY",
+}
+
+def configure_connections(engine, read_only: bool = False):
+    """
+    Apply per-connection settings: WAL mode and a busy timeout on SQLite,
+    and read-only sessions for reader engines.
+    """
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+        return
+
+    read_only_statement = READ_ONLY_STATEMENTS.get(engine.dialect.name)
+    if read_only and read_only_statement:
+        @event.listens_for(engine, "connect")
+        def set_read_only(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(read_only_statement)
+            cursor.close()
+
+def record_query_metrics(engine):
+    """
+    Time every statement the engine runs, report it to app.core.metrics and
+    log the ones slower than config.SLOW_QUERY_MS.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_times"].pop()
+        record_query(elapsed, statement)
+        if elapsed * 1000 >= config.SLOW_QUERY_MS:
+            log_slow_query(statement, parameters, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_query_timer(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        start_times = exception_context.connection.info.get("query_start_times") if exception_context.connection else None
+        if start_times:
+            record_query(time.perf_counter() - start_times.pop(), exception_context.statement or "")
+
+def make_engine(url: str, pool_size: int, max_overflow: int, read_only: bool = False):
+    """
+    Create an engine with proper settings for the backend in use.
+
+    SQLite files run in WAL mode so readers don't block on the writer, and
+    read-only engines refuse writes at the connection level.
+    """
+    if is_memory_sqlite(url):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        record_query_metrics(engine)
+        return engine
+
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=pool_size, max_overflow=max_overflow)
+    else:
+        engine = create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+    configure_connections(engine, read_only)
+    record_query_metrics(engine)
+    return engine
+
+def make_async_engine(url: str, pool_size: int, max_overflow: int, read_only: bool = False):
+    """
+    Async counterpart of make_engine, with the same connection settings.
+    """
+    if is_memory_sqlite(url):
+        engine = create_async_engine(url)
+        record_query_metrics(engine.sync_engine)
+        return engine
+
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url, pool_size=pool_size, max_overflow=max_overflow)
+    else:
+        engine = create_async_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+    configure_connections(engine.sync_engine, read_only)
+    record_query_metrics(engine.sync_engine)
+    return engine
+
+# An async driver in DATABASE_URL switches the API routers to async sessions
+ASYNC_DATABASE = is_async_url(DATABASE_URL)
+
+# Writer engine, used by everything that modifies data (and by migrations in both modes)
+engine = make_engine(sync_url(DATABASE_URL), DB_POOL_SIZE, DB_MAX_OVERFLOW)
+
+# Reader engine with its own pool; an in-memory SQLite database can't be shared, so reuse the writer
+if READ_DATABASE_URL == DATABASE_URL and is_memory_sqlite(DATABASE_URL):
+    read_engine = engine
+else:
+    read_engine = make_engine(sync_url(READ_DATABASE_URL), READ_DB_POOL_SIZE, READ_DB_MAX_OVERFLOW, read_only=True)
+
+if ASYNC_DATABASE:
+    async_engine = make_async_engine(DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    if READ_DATABASE_URL == DATABASE_URL and is_memory_sqlite(DATABASE_URL):
+        async_read_engine = async_engine
+    else:
+        async_read_engine = make_async_engine(READ_DATABASE_URL, READ_DB_POOL_SIZE, READ_DB_MAX_OVERFLOW, read_only=True)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Create Base class
 Base = declarative_base()
 
-# Database dependency
-def get_db():
+# Database dependencies (sync sessions)
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def get_sync_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Database dependencies (async sessions)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+# What the routers depend on; get_read_db is for GET routes
+get_db = get_async_db if ASYNC_DATABASE else get_sync_db
+get_read_db = get_async_read_db if ASYNC_DATABASE else get_sync_read_db
+
+# For handlers that run several independent reads concurrently, each on its own session
+def get_read_session_factory():
+    return AsyncReadSessionLocal if ASYNC_DATABASE else ReadSessionLocal
+
+async def run_db(db, func, *args):
+    """
+    Run func(session, *args) without blocking the event loop.
+
+    Async sessions run it on the event loop through run_sync, so the
+    driver's I/O is awaited; sync sessions run it on the threadpool.
+    Either way func is plain Session code, so routes work in both modes.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func, *args)
+    # Threadpool work is profiled separately when the request is being profiled
+    return await run_in_threadpool(profile_in_thread(func), db, *args)
+
+async def run_in_new_session(session_factory, func, *args):
+    """
+    Like run_db, but on a session of its own that is closed afterwards, so
+    several calls can be awaited together (e.g. with asyncio.gather).
+    """
+    db = session_factory()
+    try:
+        return await run_db(db, func, *args)
+    finally:
+        if isinstance(db, AsyncSession):
+            await db.close()
+        else:
+            await run_in_threadpool(db.close)
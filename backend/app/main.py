@@ -1,6 +1,14 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-import yaml
+from app import openapi
+from app.core.config import config
+from app.database import engine
+from app.migrations import run_migrations
+from app.core.diagnostics import ProfilingMiddleware
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
 
 # Import routers
 from app.api.auth import router as auth_router
@@ -8,47 +16,82 @@ from app.api.users import router as users_router
 from app.api.workouts import router as workouts_router
 from app.api.nutrition import router as nutrition_router
 from app.api.weight import router as weight_router
-from app.api.training_programs import router as training_programs_router
+from app.api.summary import router as summary_router
+from app.api.dashboard import router as dashboard_router
+from app.api.export import router as export_router
+from app.api.training_programs import router as training_programs_router, program_assets
 from app.api.recommendations import router as recommendations_router
 
-# Load configuration
-try:
-    with open("config.yaml", "r") as file:
-        config = yaml.safe_load(file)
-except FileNotFoundError:
-    config = {"welcome_message": "Welcome to the Fitness and Nutrition Tracking API"}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bring the schema up to date once, before serving any request
+    run_migrations(engine)
+    # Hash the training program PDFs up front instead of on the first download
+    program_assets()
+    yield
 
 # Initialize FastAPI app
 app = FastAPI(
-    title="Fitness and Nutrition Tracking API",
-    description="A FastAPI backend application for tracking users, workouts, nutrition logs, weight logs, goals, and training programs.",
-    version="1.0.0"
+    title=config.APP_TITLE,
+    description=config.APP_DESCRIPTION,
+    version=config.APP_VERSION,
+    lifespan=lifespan
 )
 
-# CORS middleware setup
-origins = [
-    "http://localhost:3000",  # React frontend
-    "http://127.0.0.1:3000"   # Alternative local frontend address
-]
+# Docs are served from the schema prebuilt by `python -m app.openapi`
+openapi.install(app)
+
+# Innermost, so a profile only covers the request's own work
+app.add_middleware(ProfilingMiddleware)
+
+# Shed over-limit clients before any work is done (inside CORS, so 429s carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
+    allow_origins=config.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"]
 )
 
+# Outermost, so shed and CORS preflight requests are timed too
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(users_router, prefix="/users")
 app.include_router(workouts_router, prefix="/workouts")
 app.include_router(nutrition_router, prefix="/nutrition")
 app.include_router(weight_router, prefix="/weight")
+app.include_router(summary_router, prefix="/summary")
+app.include_router(dashboard_router, prefix="/dashboard")
+app.include_router(export_router, prefix="/export")
 app.include_router(training_programs_router, prefix="/training-programs")
 app.include_router(recommendations_router, prefix="/recommended-calories")
 
 # Root endpoint
 @app.get("/", summary="Root Endpoint", tags=["General"])
 def read_root():
-    return {"message": config.get("welcome_message", "Welcome to the Fitness and Nutrition Tracking API")}
\ No newline at end of file
+    return {"message": config.WELCOME_MESSAGE}
+
+@app.get("/rate-limits", summary="Rate Limit Counters", tags=["General"])
+def read_rate_limits():
+    """ Requests allowed and shed per route class, and the number of tracked clients """
+    return rate_limiter.stats()
+
+def rate_limit_metrics():
+    classes = rate_limiter.stats()["classes"]
+    for name, kind, field, documentation in (
+        ("rate_limit_allowed_total", "counter", "allowed", "Requests let through by the rate limiter"),
+        ("rate_limit_limited_total", "counter", "limited", "Requests shed with 429 by the rate limiter"),
+        ("rate_limit_clients", "gauge", "clients", "Clients with a live token bucket"),
+    ):
+        yield name, kind, documentation, [({"route_class": route_class}, stats[field]) for route_class, stats in classes.items()]
+
+metrics_registry.add_collector(rate_limit_metrics)
+
+@app.get("/metrics", summary="Prometheus Metrics", tags=["General"], response_class=PlainTextResponse)
+def read_metrics():
+    """ Request latency, in-flight requests, database query metrics and rate limiting counters """
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Versioned schema migrations.
+
+Migrations run once at application startup (see app.main) and every applied
+version is recorded in the schema_migrations table, so schema changes never
+run on the request path. To change the schema, update app/models.py and append
+a new (version, name, function) entry to MIGRATIONS. The base-schema step
+creates tables from the current models, so later steps must check for the
+column/index they add before creating it.
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from app.models import Base, DailySummaryDB, NutritionLogDB, WeightLogDB, WorkoutDB
+
+logger = logging.getLogger(__name__)
+
+schema_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    schema_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+def _column_names(conn: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+def create_base_schema(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+def add_users_email(conn: Connection):
+    # Databases created before the email field was introduced
+    if "email" not in _column_names(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN email VARCHAR(255)"))
+
+# Legacy VARCHAR date values each dialect cannot turn into a DATE
+UNPARSEABLE_DATE = {
+    "sqlite": "date(date) IS NULL",
+    "mysql": "STR_TO_DATE(date, '%Y-%m-%d') IS NULL",
+    "mariadb": "STR_TO_DATE(date, '%Y-%m-%d') IS NULL",
+    "postgresql": "date !~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'",
+}
+UNPARSEABLE_DATES_LISTED = 20
+
+def _check_legacy_dates(conn: Connection, table: str):
+    """
+    Fail with the offending rows if any legacy date value cannot be converted
+    """
+    condition = UNPARSEABLE_DATE.get(conn.dialect.name)
+    if condition is None:
+        return
+    rows = conn.execute(text(
+        f"SELECT id, date FROM {table} WHERE date IS NOT NULL AND {condition} ORDER BY id"
+    )).all()
+    if rows:
+        listed = ", ".join(f"id {row.id}: {row.date!r}" for row in rows[:UNPARSEABLE_DATES_LISTED])
+        more = f" (and {len(rows) - UNPARSEABLE_DATES_LISTED} more)" if len(rows) > UNPARSEABLE_DATES_LISTED else ""
+        raise ValueError(
+            f"{table}.date has {len(rows)} value(s) that are not YYYY-MM-DD dates; "
+            f"fix or delete these rows and restart: {listed}{more}"
+        )
+
+def convert_dates_and_add_indexes(conn: Connection):
+    # Nutrition logs had no date at all; existing rows keep NULL
+    if "date" not in _column_names(conn, "nutrition_logs"):
+        conn.execute(text("ALTER TABLE nutrition_logs ADD COLUMN date DATE"))
+
+    # workouts.date and weight_logs.date used to be VARCHAR holding YYYY-MM-DD
+    dialect = conn.dialect.name
+    for table in ("workouts", "weight_logs"):
+        column = next(c for c in inspect(conn).get_columns(table) if c["name"] == "date")
+        if isinstance(column["type"], Date):
+            continue
+        # The column is NOT NULL, so values that are not dates can't be nulled out either
+        _check_legacy_dates(conn, table)
+        if dialect == "sqlite":
+            # SQLite stores DATE as ISO text anyway, so normalizing the values is enough
+            conn.execute(text(
+                f"UPDATE {table} SET date = date(date) WHERE date(date) IS NOT NULL AND date != date(date)"
+            ))
+        elif dialect in ("mysql", "mariadb"):
+            conn.execute(text(f"ALTER TABLE {table} MODIFY date DATE NOT NULL"))
+        elif dialect == "postgresql":
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN date TYPE DATE USING date::date"))
+
+    for model in (WorkoutDB, NutritionLogDB, WeightLogDB):
+        for index in model.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+def add_daily_summaries(conn: Connection):
+    # Existing data is rolled up separately with `python -m app.rollups`
+    DailySummaryDB.__table__.create(conn, checkfirst=True)
+
+def add_nutrition_keyset_index(conn: Connection):
+    # Paginated nutrition logs are keyed on id, and dates may be NULL on old rows
+    for index in NutritionLogDB.__table__.indexes:
+        if index.name == "ix_nutrition_logs_user_id_id":
+            index.create(conn, checkfirst=True)
+
+MIGRATIONS = [
+    (1, "create base schema", create_base_schema),
+    (2, "add users.email", add_users_email),
+    (3, "date columns and (user_id, date) indexes", convert_dates_and_add_indexes),
+    (4, "daily_summaries rollup table", add_daily_summaries),
+    (5, "nutrition_logs (user_id, id) index", add_nutrition_keyset_index),
+]
+
+def applied_versions(engine: Engine) -> set:
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Apply every pending migration in order and return the current schema version.
+    """
+    applied = applied_versions(engine)
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        # Each migration and its version record commit together
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        logger.info("Applied schema migration %d: %s", version, name)
+    return max(version for version, _, _ in MIGRATIONS)
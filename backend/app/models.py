@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import declarative_base
-from datetime import datetime
+from datetime import date, datetime
 
 Base = declarative_base()
 
@@ -34,24 +34,43 @@ class PasswordResetRequest(Base):
     expires_at = Column(DateTime, nullable=False)
 
 # Other existing models remain the same
+# Per-user date lookups and ranges are served by the composite (user_id, date) indexes
 class WorkoutDB(Base):
     __tablename__ = "workouts"
+    __table_args__ = (Index("ix_workouts_user_id_date", "user_id", "date"),)
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     exercise = Column(String, nullable=False)
     duration = Column(Integer, nullable=False)
-    date = Column(String, nullable=False) 
+    date = Column(Date, nullable=False)
 
 class NutritionLogDB(Base):
     __tablename__ = "nutrition_logs"
+    __table_args__ = (
+        Index("ix_nutrition_logs_user_id_date", "user_id", "date"),
+        Index("ix_nutrition_logs_user_id_id", "user_id", "id"),  # Keyset pages, which run in id order
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False)
     food = Column(String, nullable=False)
     calories = Column(Integer, nullable=False)
+    date = Column(Date, nullable=True, default=date.today)  # NULL for logs created before dates were tracked
 
 class WeightLogDB(Base):
     __tablename__ = "weight_logs"
+    __table_args__ = (Index("ix_weight_logs_user_id_date", "user_id", "date"),)
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     weight = Column(Float, nullable=False)
-    date = Column(String, nullable=False)
\ No newline at end of file
+    date = Column(Date, nullable=False)
+
+# Per-user daily totals, kept in step with nutrition_logs and workouts by app.rollups
+class DailySummaryDB(Base):
+    __tablename__ = "daily_summaries"
+    __table_args__ = (PrimaryKeyConstraint("user_id", "date"),)
+    user_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    total_calories = Column(Integer, nullable=False, default=0)
+    nutrition_entries = Column(Integer, nullable=False, default=0)
+    workout_minutes = Column(Integer, nullable=False, default=0)
+    workout_sessions = Column(Integer, nullable=False, default=0)
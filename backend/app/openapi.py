@@ -0,0 +1,83 @@
+"""
+Prebuilt OpenAPI schema.
+
+FastAPI builds the schema the first time /openapi.json or /docs is requested,
+walking every route and model, so right after a cold start that cost lands on a
+request. The schema is generated at build time instead:
+
+    python -m app.openapi [--output PATH]
+
+which writes config.OPENAPI_SCHEMA_PATH together with a fingerprint of what it
+was built from (the app package's sources and the FastAPI and pydantic
+versions). install() makes app.openapi() load that file, and fall back to
+building the schema itself, once, when the file is missing or stale.
+"""
+import argparse
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+from fastapi import FastAPI
+from app.core.config import config
+
+logger = logging.getLogger("app.openapi")
+APP_DIR = Path(__file__).resolve().parent
+
+def source_fingerprint() -> str:
+    """
+    Hash of everything the schema is derived from
+    """
+    import fastapi
+    import pydantic
+    digest = hashlib.sha256(f"fastapi {fastapi.__version__} pydantic {pydantic.VERSION}".encode())
+    for path in sorted(APP_DIR.rglob("*.py")):
+        digest.update(str(path.relative_to(APP_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def load_schema(path: str) -> Optional[dict]:
+    """
+    The prebuilt schema at path, or None if there is none or it is out of date
+    """
+    try:
+        with open(path, "rb") as file:
+            prebuilt = json.load(file)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning("Ignoring unreadable prebuilt OpenAPI schema %s", path)
+        return None
+    if prebuilt.get("fingerprint") != source_fingerprint():
+        logger.warning("Prebuilt OpenAPI schema %s is stale; run python -m app.openapi", path)
+        return None
+    return prebuilt["schema"]
+
+def write_schema(app: FastAPI, path: str) -> dict:
+    schema = FastAPI.openapi(app)
+    with open(path, "w") as file:
+        json.dump({"fingerprint": source_fingerprint(), "schema": schema}, file, separators=(",", ":"))
+    return schema
+
+def install(app: FastAPI):
+    """
+    Serve app's schema from config.OPENAPI_SCHEMA_PATH when it is current
+    """
+    def openapi() -> dict:
+        # FastAPI caches the schema on the app; only the first docs request gets here
+        if app.openapi_schema is None:
+            app.openapi_schema = load_schema(config.OPENAPI_SCHEMA_PATH) or FastAPI.openapi(app)
+        return app.openapi_schema
+    app.openapi = openapi
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild the API's OpenAPI schema.")
+    parser.add_argument("--output", default=config.OPENAPI_SCHEMA_PATH, help="Where to write it (default: config.OPENAPI_SCHEMA_PATH)")
+    args = parser.parse_args()
+
+    from app.main import app
+    schema = write_schema(app, args.output)
+    print(f"Wrote OpenAPI schema for {len(schema.get('paths', {}))} paths to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Per-user daily rollups of nutrition logs and workouts.
+
+daily_summaries holds one row per (user_id, date) with the day's total calories,
+nutrition entry count, workout minutes and workout sessions. The write paths
+call record_nutrition / record_workouts in the same transaction as the insert
+or delete they describe, so the totals never drift from the raw rows and the
+/summary endpoint reads one row per day.
+
+Existing data (or a table that has drifted) is rebuilt with the one-off backfill:
+
+    python -m app.rollups [--user USER_ID]
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.models import DailySummaryDB, NutritionLogDB, WorkoutDB
+
+COUNTERS = ("total_calories", "nutrition_entries", "workout_minutes", "workout_sessions")
+BACKFILL_BATCH_SIZE = 1000
+
+def _upsert_statement(db: Session):
+    """
+    An executemany INSERT that adds to the counters of an existing day instead of failing.
+    """
+    table = DailySummaryDB.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.date],
+            set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+        )
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        return stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in COUNTERS})
+    return None
+
+def apply_deltas(db: Session, deltas: Dict[Tuple[int, date], List[int]]):
+    """
+    Add per-day counter deltas to daily_summaries (no commit).
+
+    Args:
+        db: Database session (the caller commits, together with the raw rows)
+        deltas: {(user_id, date): [calories, entries, minutes, sessions]}
+    """
+    rows = [
+        {"user_id": user_id, "date": day, **dict(zip(COUNTERS, values))}
+        for (user_id, day), values in deltas.items()
+        if any(values)
+    ]
+    if not rows:
+        return
+
+    stmt = _upsert_statement(db)
+    if stmt is not None:
+        db.execute(stmt, rows)
+    else:
+        # Backends without an upsert: update the day if it exists, insert it otherwise
+        for row in rows:
+            summary = db.get(DailySummaryDB, (row["user_id"], row["date"]))
+            if summary is None:
+                db.add(DailySummaryDB(**row))
+            else:
+                for name in COUNTERS:
+                    setattr(summary, name, getattr(summary, name) + row[name])
+        db.flush()
+
+    # Days whose last entry was deleted don't keep an all-zero row
+    if any(value < 0 for row in rows for value in (row["nutrition_entries"], row["workout_sessions"])):
+        for row in rows:
+            db.execute(delete(DailySummaryDB).where(
+                DailySummaryDB.user_id == row["user_id"],
+                DailySummaryDB.date == row["date"],
+                DailySummaryDB.nutrition_entries <= 0,
+                DailySummaryDB.workout_sessions <= 0,
+            ))
+
+def record_nutrition(db: Session, logs: Iterable[dict], sign: int = 1):
+    """
+    Roll nutrition logs ({"user_id", "date", "calories"}) into their days; sign=-1 for deletes.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for log in logs:
+        if log["date"] is None:
+            continue  # Legacy logs without a date don't belong to any day
+        day = deltas[(log["user_id"], log["date"])]
+        day[0] += sign * log["calories"]
+        day[1] += sign
+    apply_deltas(db, deltas)
+
+def record_workouts(db: Session, workouts: Iterable[dict], sign: int = 1):
+    """
+    Roll workouts ({"user_id", "date", "duration"}) into their days; sign=-1 for deletes.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for workout in workouts:
+        day = deltas[(workout["user_id"], workout["date"])]
+        day[2] += sign * workout["duration"]
+        day[3] += sign
+    apply_deltas(db, deltas)
+
+def query_summaries(db: Session, user_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """ Daily summaries for a user within an inclusive date range (a primary key range scan) """
+    query = db.query(DailySummaryDB).filter(DailySummaryDB.user_id == user_id)
+    if date_from is not None:
+        query = query.filter(DailySummaryDB.date >= date_from)
+    if date_to is not None:
+        query = query.filter(DailySummaryDB.date <= date_to)
+    return query.order_by(DailySummaryDB.date)
+
+def backfill(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Rebuild daily_summaries from the raw rows and return the number of days written.
+
+    Args:
+        db: Database session; the rebuild is committed as a single transaction
+        user_id: Only rebuild this user's days (default: every user)
+    """
+    days = defaultdict(lambda: [0, 0, 0, 0])
+
+    nutrition = select(
+        NutritionLogDB.user_id, NutritionLogDB.date,
+        func.sum(NutritionLogDB.calories), func.count(NutritionLogDB.id),
+    ).where(NutritionLogDB.date.is_not(None)).group_by(NutritionLogDB.user_id, NutritionLogDB.date)
+    workouts = select(
+        WorkoutDB.user_id, WorkoutDB.date,
+        func.sum(WorkoutDB.duration), func.count(WorkoutDB.id),
+    ).group_by(WorkoutDB.user_id, WorkoutDB.date)
+    clear = delete(DailySummaryDB)
+    if user_id is not None:
+        nutrition = nutrition.where(NutritionLogDB.user_id == user_id)
+        workouts = workouts.where(WorkoutDB.user_id == user_id)
+        clear = clear.where(DailySummaryDB.user_id == user_id)
+
+    for uid, day, calories, entries in db.execute(nutrition):
+        days[(uid, day)][0:2] = [calories or 0, entries]
+    for uid, day, minutes, sessions in db.execute(workouts):
+        days[(uid, day)][2:4] = [minutes or 0, sessions]
+
+    rows = [
+        {"user_id": uid, "date": day, **dict(zip(COUNTERS, values))}
+        for (uid, day), values in days.items()
+    ]
+    try:
+        db.execute(clear)
+        for offset in range(0, len(rows), BACKFILL_BATCH_SIZE):
+            db.execute(insert(DailySummaryDB), rows[offset:offset + BACKFILL_BATCH_SIZE])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+def main():
+    from app.database import SessionLocal, engine
+    from app.migrations import run_migrations
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily_summaries rollup table from raw logs.")
+    parser.add_argument("--user", type=int, default=None, help="Only rebuild this user's days")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        written = backfill(db, args.user)
+    finally:
+        db.close()
+    print(f"Rebuilt {written} daily summaries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Performance benchmarks for the fitness tracker backend and chatbot microservice.
+
+Each module is a standalone script, run from the backend directory, e.g.:
+    python -m benchmarks.chatbot_upstream
+
+benchmarks.suite runs the end-to-end scenarios together and records or
+compares baselines (benchmarks/baselines/NAME.json) to catch regressions:
+    python -m benchmarks.suite --save-baseline main
+    python -m benchmarks.suite --compare main
+
+benchmarks.startup times the API's cold start and fails when importing app.main
+goes over budget or pulls in a dependency meant to be deferred:
+    python -m benchmarks.startup --budget-ms 750
+"""
@@ -0,0 +1,90 @@
+"""
+Sync vs async database sessions: throughput and memory per in-flight request.
+
+Drives the same mix of POST and GET requests against the workouts, nutrition and
+weight routers, once with sync sessions (database calls on the threadpool) and
+once with aiosqlite AsyncSessions (database calls awaited on the event loop).
+Memory is the tracemalloc peak above the idle baseline, divided by the number
+of requests in flight. Usage (from the backend directory):
+
+    python -m benchmarks.async_db [--requests 600] [--concurrency 50,200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.utils import load_api_app, print_table, run_concurrent, use_temp_database
+
+START = date(2025, 1, 1)
+DAYS = 30
+
+async def run_mode(args, async_sessions: bool, concurrency: int):
+    import httpx
+    app = load_api_app()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_database(app, os.path.join(tmp, "bench.db"), async_sessions=async_sessions)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            response = await client.post("/register", json={
+                "username": "async", "password": "benchmark-password", "name": "Async", "age": 30
+            })
+            user_id = response.json()["user"]["id"]
+            window = {"from": START.isoformat(), "to": (START + timedelta(days=DAYS)).isoformat()}
+            counter = iter(range(1_000_000))
+
+            async def request():
+                i = next(counter)
+                day = (START + timedelta(days=i % DAYS)).isoformat()
+                kind = i % 6
+                if kind == 0:
+                    response = await client.post("/workouts", json={"user_id": user_id, "exercise": "Run", "duration": 30, "date": day})
+                elif kind == 1:
+                    response = await client.post("/nutrition", json={"user_id": user_id, "food": "Rice", "calories": 300, "date": day})
+                elif kind == 2:
+                    response = await client.post("/weight", json={"user_id": user_id, "weight": 80.0, "date": day})
+                else:
+                    path = ("/workouts/{}", "/nutrition/{}", "/weight/{}")[kind - 3].format(user_id)
+                    response = await client.get(path, params=window)
+                response.raise_for_status()
+
+            # Warm up pools and make sure every GET has rows to return
+            for _ in range(6):
+                await request()
+
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = await run_concurrent(request, concurrency, args.requests)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        app.dependency_overrides.clear()
+
+    return {
+        "sessions": "async" if async_sessions else "sync",
+        "in_flight": concurrency,
+        **result,
+        "kib_per_request": round((peak - baseline) / concurrency / 1024, 1),
+    }
+
+async def run(args):
+    rows = []
+    for concurrency in args.concurrency:
+        for async_sessions in (False, True):
+            rows.append(await run_mode(args, async_sessions, concurrency))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=600, help="Requests per run")
+    parser.add_argument("--concurrency", type=lambda value: [int(v) for v in value.split(",")], default=[50, 200],
+                        help="Comma-separated in-flight request counts")
+    args = parser.parse_args()
+
+    print_table("Sync vs async database sessions", asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
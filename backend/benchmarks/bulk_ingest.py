@@ -0,0 +1,75 @@
+"""
+Bulk vs single-row ingestion throughput.
+
+Inserts the same number of workouts, nutrition logs and weight logs through the
+single-row POST endpoints and through the /bulk endpoints, and reports rows/sec
+for both paths. Usage (from the backend directory):
+
+    python -m benchmarks.bulk_ingest [--rows 1000] [--batch 500]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.utils import load_api_app, print_table, use_temp_database
+
+def make_entries(kind: str, user_id: int, count: int):
+    start = date(2020, 1, 1)
+    for i in range(count):
+        day = (start + timedelta(days=i)).isoformat()
+        if kind == "workouts":
+            yield {"user_id": user_id, "exercise": "Running", "duration": 30 + i % 30, "date": day}
+        elif kind == "nutrition":
+            yield {"user_id": user_id, "food": "Oatmeal", "calories": 300 + i % 200, "date": day}
+        else:
+            yield {"user_id": user_id, "weight": 80 - (i % 50) / 10, "date": day}
+
+async def run(args):
+    import httpx
+    app = load_api_app()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_database(app, os.path.join(tmp, "bench.db"))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            response = await client.post("/register", json={
+                "username": "bulk", "password": "benchmark-password", "name": "Bulk", "age": 30
+            })
+            user_id = response.json()["user"]["id"]
+
+            for kind, path in (("workouts", "/workouts"), ("nutrition", "/nutrition"), ("weight", "/weight")):
+                entries = list(make_entries(kind, user_id, args.rows))
+
+                start = time.perf_counter()
+                for entry in entries:
+                    (await client.post(path, json=entry)).raise_for_status()
+                single = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for offset in range(0, len(entries), args.batch):
+                    (await client.post(f"{path}/bulk", json=entries[offset:offset + args.batch])).raise_for_status()
+                bulk = time.perf_counter() - start
+
+                rows.append({
+                    "table": kind,
+                    "rows": len(entries),
+                    "single_rows_per_s": round(len(entries) / single, 1),
+                    "bulk_rows_per_s": round(len(entries) / bulk, 1),
+                    "speedup": f"{single / bulk:.1f}x",
+                })
+        app.dependency_overrides.clear()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows to insert per table and path")
+    parser.add_argument("--batch", type=int, default=500, help="Entries per bulk request")
+    args = parser.parse_args()
+    print_table("Ingestion throughput (SQLite)", asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
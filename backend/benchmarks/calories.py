@@ -0,0 +1,80 @@
+"""
+Calorie recommendation throughput: single-profile vs batch.
+
+Computes recommendations for the same set of generated client profiles through
+the single-profile endpoint (cold, then again with every profile memoized),
+through the batch endpoint, and through the in-process functions behind them,
+and reports profiles/sec for each path. Usage (from the backend directory):
+
+    python -m benchmarks.calories [--profiles 5000] [--batch 5000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.utils import load_api_app, print_table
+
+def make_profiles(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        {
+            "age": rng.randint(18, 80),
+            "weight": round(rng.uniform(45, 130), 1),
+            "height": rng.randint(150, 205),
+            "gender": rng.choice(["male", "female"]),
+            "activity_level": rng.choice(["low", "medium", "high"]),
+            "target": rng.choice([None, "weight loss", "muscle gain", "maintenance"]),
+        }
+        for _ in range(count)
+    ]
+
+async def run(args):
+    import httpx
+    app = load_api_app()
+    from app.api.recommendations import calculate_calories, calculate_calories_batch, normalize_profile
+
+    profiles = make_profiles(args.profiles)
+    rows = []
+
+    def row(path: str, elapsed: float):
+        rows.append({"path": path, "profiles": len(profiles), "seconds": round(elapsed, 3),
+                     "profiles_per_s": round(len(profiles) / elapsed, 1)})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+        calculate_calories.cache_clear()
+        for label in ("GET single (cold cache)", "GET single (memoized)"):
+            start = time.perf_counter()
+            for profile in profiles:
+                params = {key: value for key, value in profile.items() if value is not None}
+                (await client.get("/recommended-calories", params=params)).raise_for_status()
+            row(label, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(0, len(profiles), args.batch):
+            (await client.post("/recommended-calories/batch", json=profiles[offset:offset + args.batch])).raise_for_status()
+        row(f"POST batch ({args.batch}/request)", time.perf_counter() - start)
+
+    normalized = [normalize_profile(**profile) for profile in profiles]
+    calculate_calories.cache_clear()
+    start = time.perf_counter()
+    for profile in normalized:
+        calculate_calories(*profile)
+    row("calculate_calories loop", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    calculate_calories_batch(normalized)
+    row("calculate_calories_batch", time.perf_counter() - start)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=5000, help="Number of client profiles")
+    parser.add_argument("--batch", type=int, default=5000, help="Profiles per batch request")
+    args = parser.parse_args()
+
+    print_table("Calorie recommendations: single vs batch", asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
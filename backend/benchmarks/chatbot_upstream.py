@@ -0,0 +1,76 @@
+"""
+Chatbot throughput against a local fake Mistral upstream.
+
+Starts a fake chat-completions server with a fixed simulated latency, points the
+chatbot microservice at it and measures requests/sec at 1, 10 and 100 concurrent
+users. Usage (from the backend directory):
+
+    python -m benchmarks.chatbot_upstream [--latency 0.2] [--requests 300]
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.utils import add_chatbot_to_path, print_table, run_concurrent, serve_in_thread
+
+FAKE_UPSTREAM_PORT = 8765
+
+def build_fake_upstream(latency: float):
+    from fastapi import FastAPI
+
+    fake = FastAPI()
+
+    @fake.post("/v1/chat/completions")
+    async def completions(body: dict):
+        await asyncio.sleep(latency)
+        question = body["messages"][-1]["content"]
+        return {"choices": [{"message": {"content": f"Fake answer to: {question}"}}]}
+
+    return fake
+
+async def run(concurrency_levels, total_requests):
+    import httpx
+    from llm_chatbot_main import app
+    from llm_chatbot_utils import close_http_client
+
+    rows = []
+    counter = iter(range(10**9))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://chatbot") as client:
+        for concurrency in concurrency_levels:
+            shed = []
+
+            async def ask():
+                # Unique questions so the answer cache and coalescing don't flatter the numbers
+                question = f"How much protein do I need? #{next(counter)}"
+                response = await client.post("/chatbot/llm_chatbot/", json={"question": question})
+                if response.status_code == 429:
+                    shed.append(1)
+                    return
+                response.raise_for_status()
+
+            count = max(total_requests, concurrency * 3)
+            result = await run_concurrent(ask, concurrency, count)
+            rows.append({"users": concurrency, **result, "shed_429": len(shed)})
+    await close_http_client()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated upstream latency in seconds")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per concurrency level")
+    args = parser.parse_args()
+
+    os.environ["MISTRAL_API_URL"] = f"http://127.0.0.1:{FAKE_UPSTREAM_PORT}/v1/chat/completions"
+    os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+    add_chatbot_to_path()
+
+    server = serve_in_thread(build_fake_upstream(args.latency), FAKE_UPSTREAM_PORT)
+    try:
+        rows = asyncio.run(run([1, 10, 100], args.requests))
+    finally:
+        server.should_exit = True
+    print_table(f"Chatbot endpoint vs fake upstream ({args.latency * 1000:.0f} ms latency)", rows)
+
+if __name__ == "__main__":
+    main()
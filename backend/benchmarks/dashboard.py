@@ -0,0 +1,75 @@
+"""
+Dashboard latency: one /dashboard call vs the separate calls the frontend makes.
+
+Seeds a user with a few months of workouts, nutrition logs and weight logs,
+then measures the time to assemble the dashboard data both ways: the current
+sequence of /me, /workouts/{id}, /nutrition/{id} and /weight/{id}, and a single
+/dashboard request. Usage (from the backend directory):
+
+    python -m benchmarks.dashboard [--requests 300] [--concurrency 10] [--days 90]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.utils import load_api_app, print_table, run_concurrent, use_temp_database
+
+PASSWORD = "benchmark-password"
+
+async def run(args):
+    import httpx
+    app = load_api_app()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_database(app, os.path.join(tmp, "bench.db"))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            response = await client.post("/register", json={
+                "username": "dash", "password": PASSWORD, "name": "Dash", "age": 30
+            })
+            user_id = response.json()["user"]["id"]
+            today = date.today()
+            days = [(today - timedelta(days=i)).isoformat() for i in range(args.days)]
+            await client.post("/workouts/bulk", json=[
+                {"user_id": user_id, "exercise": "Run", "duration": 30, "date": day} for day in days
+            ])
+            await client.post("/nutrition/bulk", json=[
+                {"user_id": user_id, "food": "Meal", "calories": 500, "date": day} for day in days for _ in range(3)
+            ])
+            await client.post("/weight/bulk", json=[
+                {"user_id": user_id, "weight": 80.0, "date": day} for day in days
+            ])
+            token = (await client.post("/login", data={"username": "dash", "password": PASSWORD})).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            async def separate_calls():
+                for path, params in (
+                    ("/me", None),
+                    (f"/workouts/{user_id}", {"date": today.isoformat()}),
+                    (f"/nutrition/{user_id}", None),
+                    (f"/weight/{user_id}", None),
+                ):
+                    (await client.get(path, params=params, headers=headers)).raise_for_status()
+
+            async def dashboard():
+                (await client.get("/dashboard", headers=headers)).raise_for_status()
+
+            rows.append({"path": "4 separate calls", **await run_concurrent(separate_calls, args.concurrency, args.requests)})
+            rows.append({"path": "/dashboard", **await run_concurrent(dashboard, args.concurrency, args.requests)})
+        app.dependency_overrides.clear()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="Dashboard loads per path")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent dashboard loads")
+    parser.add_argument("--days", type=int, default=90, help="Days of seeded history")
+    args = parser.parse_args()
+
+    print_table("Dashboard data: separate calls vs /dashboard", asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Streaming export of a synthetic user's history: throughput and peak memory.
+
+Seeds users with growing histories (split across workouts, nutrition logs and
+weight logs), streams each one through the export generator in every format,
+and reports rows/sec and the tracemalloc peak. Flat peak memory across sizes
+means the export never materializes the history. Usage (from the backend
+directory):
+
+    python -m benchmarks.export_history [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.utils import print_table
+
+INSERT_BATCH = 50_000
+
+def seed_user(engine, username: str, rows: int) -> int:
+    from sqlalchemy import insert
+    from app.models import NutritionLogDB, UserDB, WeightLogDB, WorkoutDB
+
+    start = date(1990, 1, 1)
+    with engine.begin() as conn:
+        user_id = conn.execute(insert(UserDB).values(username=username, password="x", name=username, age=30)).inserted_primary_key[0]
+        per_type = rows // 3
+        for model, make in (
+            (WorkoutDB, lambda i: {"user_id": user_id, "exercise": "Run", "duration": 30, "date": start + timedelta(days=i // 3)}),
+            (NutritionLogDB, lambda i: {"user_id": user_id, "food": "Rice, white", "calories": 300, "date": start + timedelta(days=i // 3)}),
+            (WeightLogDB, lambda i: {"user_id": user_id, "weight": 80.5, "date": start + timedelta(days=i // 3)}),
+        ):
+            count = per_type + (rows - 3 * per_type if model is WeightLogDB else 0)
+            for offset in range(0, count, INSERT_BATCH):
+                conn.execute(insert(model), [make(i) for i in range(offset, min(offset + INSERT_BATCH, count))])
+    return user_id
+
+def run(args):
+    from sqlalchemy.orm import sessionmaker
+    from app.api.export import stream_export
+    from app.database import make_engine
+    from app.migrations import run_migrations
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", pool_size=2, max_overflow=0)
+        run_migrations(engine)
+        session_factory = sessionmaker(bind=engine)
+        for size in args.sizes:
+            user_id = seed_user(engine, f"export_{size}", size)
+            for export_format, compress in (("ndjson", False), ("csv", False), ("ndjson", True)):
+                tracemalloc.start()
+                start = time.perf_counter()
+                sent = sum(len(chunk) for chunk in stream_export(session_factory, user_id, export_format, compress))
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                rows.append({
+                    "rows": size,
+                    "format": export_format + (" + gzip" if compress else ""),
+                    "mib_sent": round(sent / 1024 / 1024, 1),
+                    "rows_per_s": round(size / elapsed),
+                    "peak_mib": round(peak / 1024 / 1024, 2),
+                })
+        engine.dispose()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(v) for v in value.split(",")], default=[10_000, 100_000, 1_000_000],
+                        help="Comma-separated history sizes (rows per synthetic user)")
+    args = parser.parse_args()
+
+    print_table("Streaming export of a user's history", run(args))
+
+if __name__ == "__main__":
+    main()
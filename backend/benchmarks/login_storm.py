@@ -0,0 +1,73 @@
+"""
+Login storm: bcrypt pool throughput and its effect on unrelated routes.
+
+Measures the p99 of an unrelated DB-backed route (GET /workouts/{id}) on an idle
+server, then again while a burst of concurrent logins is running, and reports
+login throughput. Tune the pool with BCRYPT_WORKERS / BCRYPT_MAX_QUEUE /
+BCRYPT_ROUNDS. Usage (from the backend directory):
+
+    python -m benchmarks.login_storm [--logins 200] [--login-users 50]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from benchmarks.utils import load_api_app, print_table, run_concurrent, use_temp_database
+
+PASSWORD = "benchmark-password"
+
+async def run(args):
+    import httpx
+    app = load_api_app()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_database(app, os.path.join(tmp, "bench.db"))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            await client.post("/register", json={
+                "username": "storm", "password": PASSWORD, "name": "Storm", "age": 30, "email": "storm@example.com"
+            })
+            await client.post("/workouts", json={"user_id": 1, "exercise": "Run", "duration": 30, "date": "2025-01-01"})
+
+            async def unrelated():
+                response = await client.get("/workouts/1", params={"date": "2025-01-01"})
+                response.raise_for_status()
+
+            shed = []
+
+            async def login():
+                response = await client.post("/login", data={"username": "storm", "password": PASSWORD})
+                if response.status_code == 503:
+                    shed.append(1)
+                    return
+                response.raise_for_status()
+
+            rows.append({"phase": "idle", "route": "GET /workouts", **await run_concurrent(unrelated, 10, args.reads), "shed_503": 0})
+
+            storm = asyncio.ensure_future(run_concurrent(login, args.login_users, args.logins))
+            await asyncio.sleep(0.1)
+            reads = await run_concurrent(unrelated, 10, args.reads)
+            logins = await storm
+            rows.append({"phase": "storm", "route": "GET /workouts", **reads, "shed_503": 0})
+            rows.append({"phase": "storm", "route": "POST /login", **logins, "shed_503": len(shed)})
+        app.dependency_overrides.clear()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Total login attempts in the storm")
+    parser.add_argument("--login-users", type=int, default=50, help="Concurrent login clients")
+    parser.add_argument("--reads", type=int, default=300, help="Unrelated-route requests per phase")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    from app.core.config import config
+    print_table(
+        f"Login storm (bcrypt rounds={config.BCRYPT_ROUNDS}, workers={config.BCRYPT_WORKERS}, queue={config.BCRYPT_MAX_QUEUE})",
+        rows,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Mixed read/write load: GET latency while writers are inserting.
+
+Runs concurrent readers (GET /workouts, /nutrition, /weight) alongside concurrent
+writers (POST to the same routers), first with every route on the writer engine
+and then with GET routes on the read-only engine, and reports p50/p95/p99 and
+throughput for both. Usage (from the backend directory):
+
+    python -m benchmarks.mixed_read_write [--reads 600] [--writes 300] [--readers 20] [--writers 5]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.utils import load_api_app, print_table, run_concurrent, use_temp_database
+
+START = date(2025, 1, 1)
+DAYS = 60
+
+async def run_mode(args, split_reads: bool):
+    import httpx
+    app = load_api_app()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        use_temp_database(app, os.path.join(tmp, "bench.db"), split_reads=split_reads)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            response = await client.post("/register", json={
+                "username": "mixed", "password": "benchmark-password", "name": "Mixed", "age": 30
+            })
+            user_id = response.json()["user"]["id"]
+            window = {"from": START.isoformat(), "to": (START + timedelta(days=DAYS)).isoformat()}
+
+            counter = iter(range(1_000_000))
+
+            async def write():
+                i = next(counter)
+                day = (START + timedelta(days=i % DAYS)).isoformat()
+                kind = i % 3
+                if kind == 0:
+                    response = await client.post("/workouts", json={"user_id": user_id, "exercise": "Run", "duration": 30, "date": day})
+                elif kind == 1:
+                    response = await client.post("/nutrition", json={"user_id": user_id, "food": "Rice", "calories": 300, "date": day})
+                else:
+                    response = await client.post("/weight", json={"user_id": user_id, "weight": 80.0, "date": day})
+                response.raise_for_status()
+
+            async def read():
+                i = next(counter)
+                path = ("/workouts/{}", "/nutrition/{}", "/weight/{}")[i % 3].format(user_id)
+                response = await client.get(path, params=window)
+                response.raise_for_status()
+
+            # The GET routes answer 404 for an empty range, so every reader needs at least one row
+            for _ in range(3):
+                await write()
+
+            writes, reads = await asyncio.gather(
+                run_concurrent(write, args.writers, args.writes),
+                run_concurrent(read, args.readers, args.reads),
+            )
+        app.dependency_overrides.clear()
+
+    mode = "split" if split_reads else "single"
+    rows.append({"routing": mode, "traffic": "GET", **reads})
+    rows.append({"routing": mode, "traffic": "POST", **writes})
+    return rows
+
+async def run(args):
+    rows = []
+    for split_reads in (False, True):
+        rows.extend(await run_mode(args, split_reads))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=600, help="Total GET requests")
+    parser.add_argument("--writes", type=int, default=300, help="Total POST requests")
+    parser.add_argument("--readers", type=int, default=20, help="Concurrent readers")
+    parser.add_argument("--writers", type=int, default=5, help="Concurrent writers")
+    args = parser.parse_args()
+
+    print_table("Mixed read/write (single engine vs read/write split)", asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Read-path serialization: hydrated ORM objects vs projected columns and response models.
+
+Seeds one user with a long weight history and times building the GET
+/weight/{user_id} response body both ways: the old path (full WeightLogDB
+objects through jsonable_encoder and JSONResponse) and the current one (only
+the needed columns, validated and dumped to JSON by the Pydantic response
+model). Reports time and tracemalloc peak memory. Usage (from the backend
+directory):
+
+    python -m benchmarks.serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.utils import print_table
+
+def measure(build, repeat: int) -> dict:
+    build()  # Warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = build()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"bytes": len(body), "best_ms": round(min(timings) * 1000, 2), "peak_mib": round(peak / 1024 / 1024, 2)}
+
+def run(args):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import insert
+    from sqlalchemy.orm import sessionmaker
+    from app.api.weight import WeightLogsResponse, list_weight_logs, query_weight_logs
+    from app.database import make_engine
+    from app.migrations import run_migrations
+    from app.models import UserDB, WeightLogDB
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", pool_size=1, max_overflow=0)
+        run_migrations(engine)
+        with engine.begin() as conn:
+            user_id = conn.execute(insert(UserDB).values(username="history", password="x", name="History", age=30)).inserted_primary_key[0]
+            start = date(2000, 1, 1)
+            conn.execute(insert(WeightLogDB), [
+                {"user_id": user_id, "weight": 80 + (i % 100) / 10, "date": start + timedelta(days=i)}
+                for i in range(args.rows)
+            ])
+        db = sessionmaker(bind=engine)()
+
+        def orm_objects():
+            db.expunge_all()
+            logs = query_weight_logs(db, user_id).all()
+            return JSONResponse(jsonable_encoder({"logs": logs})).body
+
+        def projected():
+            payload = list_weight_logs(db, user_id, None, None, None, None)
+            return WeightLogsResponse.model_validate(payload).model_dump_json(exclude_unset=True).encode()
+
+        rows = [
+            {"path": "ORM objects + jsonable_encoder", "rows": args.rows, **measure(orm_objects, args.repeat)},
+            {"path": "projected columns + response model", "rows": args.rows, **measure(projected, args.repeat)},
+        ]
+        db.close()
+        engine.dispose()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Weight logs in the history")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions (best is reported)")
+    args = parser.parse_args()
+
+    print_table("GET /weight/{user_id} body for one history", run(args))
+
+if __name__ == "__main__":
+    main()
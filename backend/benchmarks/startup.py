@@ -0,0 +1,123 @@
+"""
+API cold start: import time of app.main, lifespan startup and the first docs hit.
+
+Every run is a fresh interpreter (what a newly scheduled replica pays). The
+import is timed inside the child, so interpreter startup itself is excluded,
+and the slowest top-level imports are listed from one `python -X importtime`
+run. The script exits with status 1 when the median import time is over
+--budget-ms, or when a dependency that should be deferred (DEFERRED_MODULES) is
+imported at startup, so CI can run it as a gate. Usage (from the backend
+directory):
+
+    python -m benchmarks.startup [--runs 7] [--budget-ms 750]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.utils import BACKEND_DIR, print_table
+
+# Only loaded by the requests that need them (password hashing, tokens, config.yaml, trends)
+DEFERRED_MODULES = ("bcrypt", "jwt", "yaml", "numpy")
+IMPORT_BUDGET_MS = 750
+
+CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def startup():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+asyncio.run(startup())
+started = time.perf_counter()
+app.main.app.openapi()
+docs = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (started - imported) * 1000,
+    "first_docs_ms": (docs - started) * 1000,
+    "deferred_loaded": sorted(set(sys.argv[1:]) & set(sys.modules)),
+}))
+"""
+
+def child_env() -> dict:
+    # An in-memory database keeps the runs from touching (or migrating) real files
+    return {**os.environ, "DATABASE_URL": "sqlite://", "READ_DATABASE_URL": "sqlite://"}
+
+def measure(runs: int) -> list:
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, *DEFERRED_MODULES], cwd=BACKEND_DIR, env=child_env(),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    return results
+
+def import_breakdown(top: int) -> list:
+    """
+    Slowest modules imported directly at app.main's top level (cumulative ms)
+    """
+    def importtime(code: str) -> dict:
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR, env=child_env(),
+            capture_output=True, text=True, check=True,
+        ).stderr
+        modules = {}
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if not cumulative.strip().isdigit():
+                continue  # Header
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            modules[name.strip()] = (depth, int(cumulative) / 1000)
+        return modules
+
+    # Modules the bare interpreter imports anyway (site, .pth hooks) are not ours
+    baseline = importtime("pass")
+    modules = importtime("import app.main")
+    rows = [
+        {"module": name, "cumulative_ms": round(ms, 1)}
+        for name, (depth, ms) in modules.items() if depth == 1 and name not in baseline
+    ]
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="Fail when the median import of app.main is slower")
+    parser.add_argument("--top", type=int, default=12, help="Top-level imports to list")
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    rows = []
+    for field in ("import_ms", "lifespan_ms", "first_docs_ms"):
+        samples = [result[field] for result in results]
+        rows.append({
+            "phase": field[:-3], "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1), "max_ms": round(max(samples), 1),
+        })
+    print_table(f"API cold start ({args.runs} fresh interpreters)", rows)
+    print_table("Slowest top-level imports of app.main", import_breakdown(args.top))
+
+    failures = []
+    median_import = rows[0]["median_ms"]
+    if median_import > args.budget_ms:
+        failures.append(f"median import of app.main took {median_import} ms (budget {args.budget_ms:g} ms)")
+    loaded = sorted({name for result in results for name in result["deferred_loaded"]})
+    if loaded:
+        failures.append(f"imported at startup but meant to be deferred: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: median import {median_import} ms within the {args.budget_ms:g} ms budget")
+
+if __name__ == "__main__":
+    main()
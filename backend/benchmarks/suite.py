@@ -0,0 +1,329 @@
+"""
+Benchmark suite: realistic scenarios, stored baselines and regression checks.
+
+Seeds a fresh SQLite database (users with --days of workouts, nutrition logs
+and weight logs, generated from --seed so every run sees the same data), then
+runs each scenario and reports requests/sec and p50/p95/p99:
+
+    login_storm      concurrent POST /login for the seeded users (bcrypt pool)
+    dashboard_reads  authenticated GET /dashboard for random seeded days
+    bulk_logging     POST /workouts|nutrition|weight/bulk batches
+    chatbot          POST /chatbot/llm_chatbot/ against a local fake upstream
+
+The apps are driven in-process through httpx's ASGI transport, over real HTTP
+through uvicorn, or both (--transport). Per-client rate limits are switched off
+so the scenarios measure the routes, not the limiter.
+
+--save-baseline NAME stores the results in benchmarks/baselines/NAME.json, and
+--compare NAME reports every scenario against that baseline: a p95 that grew, or
+a throughput that dropped, by more than --tolerance is flagged as a regression
+and the run exits with status 1. Baselines are only comparable on the machine
+(and settings) that recorded them. Usage (from the backend directory):
+
+    python -m benchmarks.suite [--transport asgi|uvicorn|both] [--scenarios login_storm,chatbot]
+                               [--save-baseline NAME] [--compare NAME] [--tolerance 0.25]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from itertools import count, cycle
+
+from benchmarks.utils import BACKEND_DIR, add_chatbot_to_path, load_api_app, print_table, run_concurrent, serve_in_thread, use_temp_database
+
+BASELINE_DIR = os.path.join(BACKEND_DIR, "benchmarks", "baselines")
+PASSWORD = "benchmark-password"
+START = date(2024, 1, 1)
+FOODS = ["Oatmeal", "Chicken breast", "Rice, white", "Salmon", "Greek yogurt", "Banana"]
+EXERCISES = ["Running", "Cycling", "Rowing", "Squats", "Bench press"]
+# Shared across transports, so no chatbot question is ever answered from the cache
+QUESTION_NUMBERS = count()
+
+class Seeded:
+    """
+    What the scenarios need to know about the seeded data
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.users = []  # (user_id, username, token)
+        self.days = []
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def outcome(response, errors: list):
+    # Shed (429/503) and failed requests are counted, not raised, so a run always completes
+    if response.status_code >= 400:
+        errors.append(response.status_code)
+
+async def seed(client, args) -> Seeded:
+    seeded = Seeded(random.Random(args.seed))
+    rng = seeded.rng
+    seeded.days = [START + timedelta(days=i) for i in range(args.days)]
+    for i in range(args.users):
+        username = f"bench_{i}"
+        response = await client.post("/register", json={
+            "username": username, "password": PASSWORD, "name": f"Bench {i}", "age": rng.randint(18, 70),
+            "gender": rng.choice(["male", "female"]), "height": rng.randint(150, 200), "weight": rng.randint(50, 110),
+        })
+        response.raise_for_status()
+        user_id = response.json()["user"]["id"]
+        login = await client.post("/login", data={"username": username, "password": PASSWORD})
+        login.raise_for_status()
+        seeded.users.append((user_id, username, login.json()["access_token"]))
+
+        weight = rng.uniform(60, 100)
+        for path, entries in (
+            ("/workouts/bulk", [
+                {"user_id": user_id, "exercise": rng.choice(EXERCISES), "duration": rng.randint(15, 90), "date": day.isoformat()}
+                for day in seeded.days if rng.random() < 0.6
+            ]),
+            ("/nutrition/bulk", [
+                {"user_id": user_id, "food": rng.choice(FOODS), "calories": rng.randint(150, 900), "date": day.isoformat()}
+                for day in seeded.days for _ in range(3)
+            ]),
+            ("/weight/bulk", [
+                {"user_id": user_id, "weight": round(weight - i * 0.02 + rng.uniform(-0.5, 0.5), 1), "date": day.isoformat()}
+                for i, day in enumerate(seeded.days)
+            ]),
+        ):
+            (await client.post(path, json=entries)).raise_for_status()
+    return seeded
+
+async def login_storm(client, seeded: Seeded, args) -> dict:
+    users = cycle(seeded.users)
+    errors = []
+
+    async def call():
+        _, username, _ = next(users)
+        outcome(await client.post("/login", data={"username": username, "password": PASSWORD}), errors)
+
+    return {**await run_concurrent(call, args.concurrency, args.logins), "errors": len(errors)}
+
+async def dashboard_reads(client, seeded: Seeded, args) -> dict:
+    rng = random.Random(args.seed)
+    errors = []
+
+    async def call():
+        _, _, token = rng.choice(seeded.users)
+        day = rng.choice(seeded.days).isoformat()
+        outcome(await client.get("/dashboard", params={"date": day}, headers={"Authorization": f"Bearer {token}"}), errors)
+
+    return {**await run_concurrent(call, args.concurrency, args.requests), "errors": len(errors)}
+
+async def bulk_logging(client, seeded: Seeded, args) -> dict:
+    rng = random.Random(args.seed)
+    paths = cycle(("/workouts/bulk", "/nutrition/bulk", "/weight/bulk"))
+    errors = []
+
+    def entry(path, user_id, day):
+        if path == "/workouts/bulk":
+            return {"user_id": user_id, "exercise": rng.choice(EXERCISES), "duration": rng.randint(15, 90), "date": day}
+        if path == "/nutrition/bulk":
+            return {"user_id": user_id, "food": rng.choice(FOODS), "calories": rng.randint(150, 900), "date": day}
+        return {"user_id": user_id, "weight": round(rng.uniform(60, 100), 1), "date": day}
+
+    async def call():
+        path = next(paths)
+        user_id = rng.choice(seeded.users)[0]
+        batch = [entry(path, user_id, rng.choice(seeded.days).isoformat()) for _ in range(args.batch)]
+        outcome(await client.post(path, json=batch), errors)
+
+    result = await run_concurrent(call, args.concurrency, args.bulk_requests)
+    return {**result, "errors": len(errors)}
+
+async def chatbot(client, seeded: Seeded, args) -> dict:
+    errors = []
+
+    async def call():
+        # Unique questions, so the answer cache and request coalescing don't flatter the numbers
+        question = f"How much protein do I need? #{next(QUESTION_NUMBERS)}"
+        response = await client.post("/chatbot/llm_chatbot/", json={"question": question})
+        outcome(response, errors)
+
+    return {**await run_concurrent(call, args.concurrency, args.requests), "errors": len(errors)}
+
+# Scenario name -> (coroutine, which app it drives)
+SCENARIOS = {
+    "login_storm": (login_storm, "api"),
+    "dashboard_reads": (dashboard_reads, "api"),
+    "bulk_logging": (bulk_logging, "api"),
+    "chatbot": (chatbot, "chatbot"),
+}
+
+async def start_uvicorn(app, port: int):
+    """
+    Serve app over HTTP on this event loop (the apps' asyncio primitives stay on one loop)
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # Surface startup errors
+        await asyncio.sleep(0.01)
+    return server, task
+
+async def run_transport(transport: str, apps: dict, args) -> dict:
+    import httpx
+
+    servers = []
+    clients = {}
+    try:
+        for name, app in apps.items():
+            if transport == "asgi":
+                clients[name] = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=f"http://{name}", timeout=60)
+            else:
+                port = free_port()
+                servers.append(await start_uvicorn(app, port))
+                limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+                clients[name] = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60)
+
+        seeded = await seed(clients["api"], args)
+        results = {}
+        for name in args.scenarios:
+            func, target = SCENARIOS[name]
+            results[f"{transport}/{name}"] = await func(clients[target], seeded, args)
+        return results
+    finally:
+        for client in clients.values():
+            await client.aclose()
+        for server, task in servers:
+            server.should_exit = True
+            await task
+
+async def run(transports, apps: dict, args, tmp: str) -> dict:
+    from app.main import app
+
+    results = {}
+    for transport in transports:
+        # A fresh database per transport, so both see the same seeded state
+        use_temp_database(app, os.path.join(tmp, f"{transport}.db"))
+        results.update(await run_transport(transport, apps, args))
+    return results
+
+def compare(baseline: dict, results: dict, tolerance: float):
+    """
+    Rows comparing each result with its baseline, and whether any regressed
+    """
+    rows = []
+    regressed = False
+    for key, result in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            rows.append({
+                "scenario": key, "rps": result["rps"], "base_rps": "-", "rps_change": "-",
+                "p95_ms": result["p95_ms"], "base_p95_ms": "-", "p95_change": "-", "status": "new",
+            })
+            continue
+        slower = result["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+        fewer = result["rps"] < base["rps"] * (1 - tolerance)
+        regressed = regressed or slower or fewer
+        rows.append({
+            "scenario": key,
+            "rps": result["rps"],
+            "base_rps": base["rps"],
+            "rps_change": f"{(result['rps'] / base['rps'] - 1) * 100:+.1f}%" if base["rps"] else "-",
+            "p95_ms": result["p95_ms"],
+            "base_p95_ms": base["p95_ms"],
+            "p95_change": f"{(result['p95_ms'] / base['p95_ms'] - 1) * 100:+.1f}%" if base["p95_ms"] else "-",
+            "status": "REGRESSION" if slower or fewer else "ok",
+        })
+    return rows, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=("asgi", "uvicorn", "both"), default="asgi")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=10, help="Seeded users")
+    parser.add_argument("--days", type=int, default=90, help="Days of history per seeded user")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the data and request mix")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per read / chatbot scenario")
+    parser.add_argument("--logins", type=int, default=100, help="Logins in the login storm")
+    parser.add_argument("--bulk-requests", type=int, default=60, help="Bulk requests in bulk_logging")
+    parser.add_argument("--batch", type=int, default=200, help="Entries per bulk request")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Fake chatbot upstream latency in seconds")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 growth / throughput drop before a regression")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before the apps are imported: the uvicorn lifespan migrates DATABASE_URL, and the
+        # chatbot reads its upstream and per-client limit settings at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+        os.environ["CLIENT_RATE_BURST"] = str(10**9)
+        add_chatbot_to_path()
+
+        from benchmarks.chatbot_upstream import build_fake_upstream
+        from app.core.config import config
+        app = load_api_app()
+
+        # Per-request diagnostics would flood the output (the bulk scenarios trip them every time)
+        logging.getLogger("app.db").setLevel(logging.ERROR)
+        apps = {"api": app}
+        upstream = None
+        if "chatbot" in args.scenarios:
+            upstream_port = free_port()
+            os.environ["MISTRAL_API_URL"] = f"http://127.0.0.1:{upstream_port}/v1/chat/completions"
+            upstream = serve_in_thread(build_fake_upstream(args.upstream_latency), upstream_port)
+            from llm_chatbot_main import app as chatbot_app
+            apps["chatbot"] = chatbot_app
+
+        transports = ("asgi", "uvicorn") if args.transport == "both" else (args.transport,)
+        try:
+            results = asyncio.run(run(transports, apps, args, tmp))
+        finally:
+            if upstream is not None:
+                upstream.should_exit = True
+            app.dependency_overrides.clear()
+
+    print_table(f"Benchmark suite (seed={args.seed}, users={args.users}, days={args.days}, concurrency={args.concurrency})",
+                [{"scenario": key, **result} for key, result in results.items()])
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as file:
+            json.dump({
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "cpus": os.cpu_count(),
+                "bcrypt_rounds": config.BCRYPT_ROUNDS,
+                "args": {key: value for key, value in vars(args).items() if key not in ("save_baseline", "compare")},
+                "results": results,
+            }, file, indent=2)
+        print(f"\nSaved baseline {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as file:
+            baseline = json.load(file)
+        current = {key: value for key, value in vars(args).items() if key not in ("save_baseline", "compare")}
+        differing = sorted(key for key, value in baseline["args"].items() if current.get(key) != value and key != "tolerance")
+        if differing:
+            print(f"\nWarning: baseline was recorded with different settings: {', '.join(differing)}")
+        rows, regressed = compare(baseline, results, args.tolerance)
+        print_table(f"Against baseline {args.compare!r} (recorded {baseline['recorded_at']}, tolerance {args.tolerance:.0%})", rows)
+        if regressed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
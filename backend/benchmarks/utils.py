@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHATBOT_DIR = os.path.join(BACKEND_DIR, "LLM_CHATBOT")
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples (0 for an empty list).
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(latencies: List[float], elapsed: float) -> dict:
+    """
+    Turn raw per-request latencies (seconds) into throughput and percentile figures.
+    """
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+async def run_concurrent(call: Callable[[], Awaitable], concurrency: int, total: int) -> dict:
+    """
+    Fire `total` calls using `concurrency` workers and summarize their latencies.
+    """
+    latencies: List[float] = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+def serve_in_thread(app, port: int):
+    """
+    Run an ASGI app under uvicorn in a daemon thread and wait until it accepts requests.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+def add_chatbot_to_path():
+    """
+    The chatbot microservice uses flat imports, so its directory must be importable.
+    """
+    if CHATBOT_DIR not in sys.path:
+        sys.path.insert(0, CHATBOT_DIR)
+
+def print_table(title: str, rows: List[dict]):
+    """
+    Print benchmark rows as an aligned text table.
+    """
+    print(f"\n{title}")
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+def load_api_app():
+    """
+    Import the backend app with its per-client rate limiter off.
+
+    Every benchmark request comes from the one in-process client, so the
+    limiter would otherwise answer most of them with 429s.
+    """
+    from app.core.config import config
+    from app.main import app
+
+    config.RATE_LIMIT_ENABLED = False
+    return app
+
+def use_temp_database(app, path: str, split_reads: bool = True, async_sessions: bool = False):
+    """
+    Point the backend app at a fresh, fully migrated SQLite file.
+
+    With split_reads, GET routes use their own read-only engine and pool, the
+    way the app is configured by default; otherwise every route shares the
+    writer engine. With async_sessions, routes get aiosqlite AsyncSessions
+    instead of sync sessions.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.orm import sessionmaker
+    from app.database import get_db, get_read_db, get_read_session_factory, make_async_engine, make_engine
+    from app.migrations import run_migrations
+
+    url = f"sqlite:///{path}"
+    engine = make_engine(url, pool_size=5, max_overflow=10)
+    run_migrations(engine)
+
+    if async_sessions:
+        url = f"sqlite+aiosqlite:///{path}"
+        writer = make_async_engine(url, pool_size=5, max_overflow=10)
+        reader = make_async_engine(url, pool_size=10, max_overflow=20, read_only=True) if split_reads else writer
+    else:
+        writer = engine
+        reader = make_engine(url, pool_size=10, max_overflow=20, read_only=True) if split_reads else engine
+
+    def session_factory(bind):
+        if async_sessions:
+            return async_sessionmaker(bind, autoflush=False)
+        return sessionmaker(autocommit=False, autoflush=False, bind=bind)
+
+    def session_dependency(bind):
+        factory = session_factory(bind)
+        if async_sessions:
+            async def dependency():
+                async with factory() as db:
+                    yield db
+
+            return dependency
+
+        def dependency():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        return dependency
+
+    app.dependency_overrides[get_db] = session_dependency(writer)
+    app.dependency_overrides[get_read_db] = session_dependency(reader)
+    read_factory = session_factory(reader)
+    app.dependency_overrides[get_read_session_factory] = lambda: read_factory
+    return engine
@@ -3,14 +3,35 @@ from sqlalchemy.exc import SAWarning
 # Suppress DeprecationWarning for SQLite3 date adapter and MovedIn20Warning
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.filterwarnings("ignore", category=SAWarning)
+import os
+# Cheap bcrypt cost so auth tests stay fast (must be set before the app is imported)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Every test client shares one IP, so per-client limits are exercised explicitly
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from unittest.mock import patch
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, AsyncSession, get_db, get_read_db, get_read_session_factory, make_engine, make_async_engine, record_query_metrics
+from app.migrations import MIGRATIONS, run_migrations
+from app.rollups import backfill
+from app import openapi, seed
+from app.core.trends import TrendState, ewma, moving_average, trend_cache
+from app.api.recommendations import calculate_calories
+from app.api.training_programs import PDF_PATHS
+from app.core.file_cache import load_assets
+import hashlib
+import logging
+from datetime import date
+import csv
+import gzip
+import io
+import json
+from app.core.config import config
+import numpy as np
+import asyncio
 import time
-import os
 import requests
 import pytest
 from pydantic import BaseModel, Field
@@ -32,6 +53,8 @@ DATABASE_URL = "sqlite:///./test_fitness_tracker.db"
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+record_query_metrics(engine)
 
 def override_get_db():
     db = TestingSessionLocal()
@@ -41,6 +64,8 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_read_session_factory] = lambda: TestingSessionLocal
 client = TestClient(app)
 
 def clear_test_database():
@@ -88,6 +113,214 @@ def test_llm_chatbot_empty_query(mock_chatbot_error):
     assert response.status_code == 400
     mock_chatbot_error.assert_called_once()
 
+# The chatbot microservice uses flat imports from its own directory
+CHATBOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "LLM_CHATBOT")
+
+@pytest.fixture
+def chatbot_utils(monkeypatch):
+    """
+    Import the chatbot utils with a dummy API key and restore the shared client afterwards.
+    """
+    monkeypatch.setenv("MISTRAL_API_KEY", "test-key")
+    monkeypatch.syspath_prepend(CHATBOT_DIR)
+    import llm_chatbot_utils
+    yield llm_chatbot_utils
+    llm_chatbot_utils._http_client = None
+
+def test_llm_chatbot_async_client_reuses_shared_pool(chatbot_utils):
+    """
+    Test the async upstream call parses the answer and reuses one shared client.
+    """
+    import httpx
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": " Eat more protein. "}}]})
+
+    chatbot_utils._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    first = asyncio.run(chatbot_utils.ask_llm_chatbot("How much protein?"))
+    second = asyncio.run(chatbot_utils.ask_llm_chatbot("How much protein?"))
+
+    assert first == second == "Eat more protein."
+    assert len(seen) == 2
+    assert chatbot_utils.get_http_client() is chatbot_utils._http_client
+
+def test_llm_chatbot_async_client_timeout(chatbot_utils):
+    """
+    Test an upstream timeout is reported as a 504 error instead of hanging.
+    """
+    import httpx
+
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    chatbot_utils._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = asyncio.run(chatbot_utils.ask_llm_chatbot("How much protein?"))
+    assert result["error"].startswith("504:")
+
+def test_llm_chatbot_answer_cache_lru_and_ttl(chatbot_utils):
+    """
+    Test normalized lookups, LRU eviction and TTL expiry of cached answers.
+    """
+    from llm_chatbot_cache import AnswerCache
+    cache = AnswerCache(max_entries=2, ttl_seconds=60)
+
+    cache.set("How much protein to build muscle?", "1.6 g/kg")
+    assert cache.get("  how much PROTEIN to build   muscle ") == "1.6 g/kg"
+
+    cache.set("How many calories to lose weight?", "Eat in a deficit")
+    cache.set("Best cardio?", "Whatever you enjoy")
+    assert cache.get("How much protein to build muscle?") is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = AnswerCache(max_entries=2, ttl_seconds=-1)
+    expired.set("Best cardio?", "Whatever you enjoy")
+    assert expired.get("Best cardio?") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_llm_chatbot_answer_cache_disk_tier(chatbot_utils, tmp_path):
+    """
+    Test answers written to the disk tier are served after a restart.
+    """
+    from llm_chatbot_cache import AnswerCache
+    path = str(tmp_path / "answers.db")
+    AnswerCache(max_entries=10, ttl_seconds=60, disk_path=path).set("Best cardio?", "Whatever you enjoy")
+
+    restarted = AnswerCache(max_entries=10, ttl_seconds=60, disk_path=path)
+    assert restarted.get("best cardio") == "Whatever you enjoy"
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_llm_chatbot_answer_cache_disk_tier_is_async_and_bounded(chatbot_utils, tmp_path, monkeypatch):
+    """
+    Test async lookups do disk I/O off the event loop, and the disk tier is pruned to its row cap.
+    """
+    import sqlite3
+    import threading
+    from llm_chatbot_cache import AnswerCache
+    path = str(tmp_path / "answers.db")
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, disk_path=path, disk_max_entries=3, disk_prune_every=2)
+    disk_threads = []
+    get_disk = cache._get_disk
+    monkeypatch.setattr(cache, "_get_disk", lambda key: disk_threads.append(threading.get_ident()) or get_disk(key))
+
+    async def exercise():
+        for number in range(6):
+            await cache.set_async(f"Question {number}?", f"Answer {number}")
+        # Evicted from memory, so served from disk
+        return await cache.get_async("Question 3?"), threading.get_ident()
+
+    answer, loop_thread = asyncio.run(exercise())
+    assert answer == "Answer 3"
+    assert disk_threads and loop_thread not in disk_threads
+    rows = [key for (key,) in sqlite3.connect(path).execute("SELECT key FROM answers")]
+    assert len(rows) == 3 and cache.stats()["disk_pruned"] == 3
+
+def test_llm_chatbot_stream_forwards_tokens(chatbot_utils):
+    """
+    Test the SSE endpoint forwards upstream deltas and records stream timings.
+    """
+    import httpx
+    from llm_chatbot_main import app as chatbot_app
+
+    upstream_body = "".join(
+        f'data: {{"choices": [{{"delta": {{"content": "{token}"}}}}]}}\n\n' for token in ["Eat ", "more ", "fish."]
+    ) + "data: [DONE]\n\n"
+
+    def handler(request):
+        return httpx.Response(200, text=upstream_body, headers={"content-type": "text/event-stream"})
+
+    chatbot_utils._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with TestClient(chatbot_app) as chatbot_client:
+        response = chatbot_client.post("/chatbot/llm_chatbot/stream", json={"question": f"Omega 3 sources {time.time()}?"})
+        stats = chatbot_client.get("/chatbot/llm_chatbot/stats").json()["streaming"]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.count('"token"') == 3
+    assert "event: done" in response.text
+    assert stats["completed"] >= 1
+
+def test_llm_chatbot_single_flight_coalesces_identical_calls(chatbot_utils):
+    """
+    Test concurrent callers with the same key share a single upstream call.
+    """
+    from llm_chatbot_limits import SingleFlight
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "shared answer"
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("same-question", upstream) for _ in range(10)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["shared answer"] * 10
+    assert len(calls) == 1
+    assert flight.stats()["followers"] == 9
+
+def test_llm_chatbot_limiter_sheds_when_queue_full(chatbot_utils):
+    """
+    Test callers beyond the concurrency limit plus queue are rejected with Retry-After.
+    """
+    from llm_chatbot_limits import ConcurrencyLimiter, UpstreamBusyError
+
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout=5, retry_after=3)
+
+        async def call():
+            async with limiter.slot():
+                await asyncio.sleep(0.05)
+                return "ok"
+
+        return limiter, await asyncio.gather(*(call() for _ in range(3)), return_exceptions=True)
+
+    limiter, results = asyncio.run(scenario())
+    assert results.count("ok") == 2
+    shed = [r for r in results if isinstance(r, UpstreamBusyError)]
+    assert len(shed) == 1 and shed[0].retry_after == 3
+    assert limiter.stats()["shed"] == 1
+
+def test_llm_chatbot_client_rate_limit(chatbot_utils):
+    """
+    Test each client gets its own token bucket and an empty one is shed with its refill wait.
+    """
+    from llm_chatbot_limits import ClientRateLimiter, UpstreamBusyError
+    limiter = ClientRateLimiter(burst=2, per_second=0.25, max_clients=10)
+    limiter.check("10.0.0.1", now=0)
+    limiter.check("10.0.0.1", now=0)
+    with pytest.raises(UpstreamBusyError) as exc_info:
+        limiter.check("10.0.0.1", now=1)
+    assert exc_info.value.retry_after == 3
+    limiter.check("10.0.0.2", now=1)
+    limiter.check("10.0.0.1", now=4)
+    # Both buckets have refilled after 8s of silence and are forgotten
+    limiter.check("10.0.0.3", now=20)
+    assert limiter.stats() == {"burst": 2, "per_second": 0.25, "clients": 1, "allowed": 5, "limited": 1}
+    with pytest.raises(ValueError, match="per_second"):
+        ClientRateLimiter(burst=2, per_second=0, max_clients=10)
+    with pytest.raises(ValueError, match="max_clients"):
+        ClientRateLimiter(burst=2, per_second=0.25, max_clients=0)
+
+def test_llm_chatbot_metrics_endpoint(chatbot_utils):
+    """
+    Test the chatbot exports request latency per route template plus its cache and limiter figures.
+    """
+    from llm_chatbot_main import app as chatbot_app
+    chatbot_client = TestClient(chatbot_app)
+    assert chatbot_client.post("/chatbot/llm_chatbot/", json={"question": " "}).status_code == 400
+    body = chatbot_client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="POST",route="/chatbot/llm_chatbot/",status="400"}' in body
+    assert "chatbot_cache_hit_ratio " in body
+    assert "chatbot_upstream_shed " in body
+    assert "chatbot_rate_limit_limited " in body
+
 # Test Root Endpoint
 def test_read_root():
     clear_test_database()  # Clear database before running the test
@@ -254,6 +487,39 @@ def test_recommended_calories():
     assert response.status_code == 200
     assert "recommended_calories" in response.json()
 
+def test_recommended_calories_invalid_input_is_400():
+    """
+    Test an unknown activity level is rejected with a 400 and the validation message.
+    """
+    params = {"age": 30, "weight": 75.5, "height": 180, "gender": "male", "activity_level": "extreme"}
+    response = client.get("/recommended-calories", params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid activity level."
+
+def test_recommended_calories_batch_matches_single_profile():
+    """
+    Test the vectorized batch endpoint agrees with the memoized single-profile endpoint.
+    """
+    profiles = [
+        {"age": 30, "weight": 75.5, "height": 180, "gender": "male", "activity_level": "medium", "target": "weight loss"},
+        {"age": 45, "weight": 62.0, "height": 165, "gender": " Female ", "activity_level": "LOW"},
+        {"age": 22, "weight": 90.0, "height": 190, "gender": "male", "activity_level": "high", "target": "Muscle Gain"},
+        {"age": 22, "weight": 90.0, "height": 190, "gender": "robot", "activity_level": "high"},
+        {"age": "old", "weight": 90.0, "height": 190, "gender": "male", "activity_level": "high"},
+    ]
+    body = client.post("/recommended-calories/batch", json=profiles).json()
+    assert body["computed"] == 3 and body["failed"] == 2
+    assert body["results"][3]["errors"][0]["msg"] == "Invalid gender."
+    assert body["results"][4]["status"] == "invalid"
+
+    calculate_calories.cache_clear()
+    for profile, result in zip(profiles[:3], body["results"]):
+        single = client.get("/recommended-calories", params=profile).json()
+        assert result["recommended_calories"] == pytest.approx(single["recommended_calories"])
+        assert result["target"] == single["target"]
+    client.get("/recommended-calories", params={**profiles[1], "gender": "female", "activity_level": "low"})
+    assert calculate_calories.cache_info().hits == 1
+
 # Test Training Programs
 def test_training_program_list():
     clear_test_database()  # Clear database before running the test
@@ -270,6 +536,37 @@ def test_training_program_download():
     assert response.headers["content-type"] == "application/pdf"
     assert response.headers["content-disposition"] == "attachment; filename=muscle_building.pdf"
 
+@pytest.mark.parametrize("cache_mode", ["none", "memory", "mmap"])
+def test_training_program_download_caching(cache_mode):
+    """
+    Test PDF downloads carry a content-hash ETag, answer 304 and byte ranges, in every cache mode.
+    """
+    assets = load_assets(PDF_PATHS, cache_mode)
+    with patch("app.api.training_programs.program_assets", lambda: assets):
+        with open(PDF_PATHS["weight_loss"], "rb") as file:
+            body = file.read()
+        listing = client.get("/training-programs").json()["programs"]["weight_loss"]
+        assert listing["size"] == len(body)
+        assert listing["sha256"] == hashlib.sha256(body).hexdigest()
+
+        response = client.get("/training-programs/weight_loss")
+        assert response.content == body
+        assert response.headers["etag"] == listing["etag"]
+        assert "immutable" not in response.headers["cache-control"]
+        assert "immutable" in client.get(listing["url"]).headers["cache-control"]
+
+        revalidated = client.get("/training-programs/weight_loss", headers={"If-None-Match": listing["etag"]})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+
+        partial = client.get("/training-programs/weight_loss", headers={"Range": "bytes=100-199"})
+        assert partial.status_code == 206
+        assert partial.content == body[100:200]
+        assert partial.headers["content-range"] == f"bytes 100-199/{len(body)}"
+        assert client.get("/training-programs/weight_loss", headers={"Range": "bytes=-10"}).content == body[-10:]
+        stale = client.get("/training-programs/weight_loss", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert stale.status_code == 200 and stale.content == body
+        assert client.get("/training-programs/weight_loss", headers={"Range": f"bytes={len(body)}-"}).status_code == 416
+
 def test_password_reset_request():
     clear_test_database()
     user_data = create_test_user(
@@ -328,4 +625,768 @@ def test_password_reset_short_password():
         "username": "resetuser",
         "new_password": "short"
     })
-    assert reset_confirm_response.status_code == 400
\ No newline at end of file
+    assert reset_confirm_response.status_code == 400
+
+def test_password_pool_rejects_when_queue_full(monkeypatch):
+    """
+    Test bcrypt jobs beyond the pool's workers plus queue are shed with a 503.
+    """
+    import threading
+    from fastapi import HTTPException
+    from app.core import security
+    from app.core.config import config
+
+    monkeypatch.setattr(config, "BCRYPT_MAX_QUEUE", 0)
+    release = threading.Event()
+
+    async def scenario():
+        busy = [asyncio.ensure_future(security.run_password_job(release.wait)) for _ in range(config.BCRYPT_WORKERS)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await security.run_password_job(release.wait)
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+    assert security.verify_password("secret", security.get_password_hash("secret"))
+
+def test_rate_limit_sheds_with_retry_after(monkeypatch):
+    """
+    Test an exhausted bucket is shed with 429 + Retry-After, per client and per route class.
+    """
+    from app.core.rate_limit import TokenBucketStore, rate_limiter
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setitem(rate_limiter.stores, "login", TokenBucketStore(2, 0.5, 100, 60))
+    form = {"username": "nobody", "password": "wrong"}
+
+    assert [client.post("/login", data=form).status_code for _ in range(2)] == [401, 401]
+    response = client.post("/login", data=form)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    # Other route classes and other clients have their own buckets
+    assert client.get("/").status_code == 200
+    other = TestClient(app, client=("203.0.113.7", 50000))
+    assert other.post("/login", data=form).status_code == 401
+
+    counters = client.get("/rate-limits").json()["classes"]["login"]
+    assert (counters["allowed"], counters["limited"], counters["clients"]) == (3, 1, 2)
+
+def test_rate_limit_buckets_refill_and_idle_ones_are_evicted():
+    """
+    Test tokens refill at the configured rate and only fully refilled idle buckets are dropped.
+    """
+    from app.core.rate_limit import TokenBucketStore
+    store = TokenBucketStore(capacity=2, per_second=1, max_clients=2, idle_seconds=0)
+    assert store.acquire("a", now=0) == store.acquire("a", now=0) == 0
+    assert store.acquire("a", now=0.5) == pytest.approx(0.5)
+    assert store.acquire("a", now=1.0) == 0
+
+    store.acquire("b", now=1.5)
+    assert store.stats()["clients"] == 2
+    # "a" needs 2s to refill, so it survives until then
+    store.acquire("b", now=2.5)
+    assert store.stats()["clients"] == 2
+    store.acquire("b", now=3.0)
+    assert store.stats()["clients"] == 1
+    # Past max_clients the least recently used bucket goes first
+    store.acquire("c", now=3.0)
+    store.acquire("d", now=3.0)
+    assert store.stats()["clients"] == 2 and store.stats()["evicted"] == 2
+
+def test_rate_limit_settings_are_validated(monkeypatch):
+    """
+    Test a non-positive refill rate or an empty client table fails at startup with a clear error.
+    """
+    from app.core.config import Config
+    from app.core.rate_limit import TokenBucketStore
+    with pytest.raises(ValueError, match="per_second"):
+        TokenBucketStore(capacity=2, per_second=0, max_clients=10, idle_seconds=60)
+    with pytest.raises(ValueError, match="max_clients"):
+        TokenBucketStore(capacity=2, per_second=1, max_clients=0, idle_seconds=60)
+    monkeypatch.setattr(Config, "RATE_LIMITS", {"default": {"capacity": 120, "per_second": 0}})
+    with pytest.raises(ValueError, match=r"RATE_LIMITS\['default'\] per_second"):
+        Config()
+    monkeypatch.setattr(Config, "RATE_LIMITS", {"default": {"capacity": 120, "per_second": 20}})
+    monkeypatch.setattr(Config, "RATE_LIMIT_MAX_CLIENTS", 0)
+    with pytest.raises(ValueError, match="RATE_LIMIT_MAX_CLIENTS"):
+        Config()
+
+def test_metrics_endpoint_reports_route_latency_and_queries():
+    """
+    Test /metrics exposes latency per route template and the DB queries each request ran.
+    """
+    from app.core.metrics import Histogram, http_request_duration, db_queries_per_request
+    clear_test_database()
+    client.post("/register", json=create_test_user())
+    client.post("/workouts", json={"user_id": 1, "exercise": "Running", "duration": 30, "date": "2025-02-11"})
+    before = db_queries_per_request._series.get(("GET", "/workouts/{user_id}"), [[], 0.0])[1]
+    assert client.get("/workouts/1?date=2025-02-11").status_code == 200
+    assert client.get("/no-such-route").status_code == 404
+
+    counts, total = http_request_duration._series[("GET", "/workouts/{user_id}", "200")]
+    assert sum(counts) >= 1
+    # Query counts are recorded as the histogram's sum
+    assert db_queries_per_request._series[("GET", "/workouts/{user_id}")][1] > before
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/workouts/{user_id}",status="200",le="+Inf"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}' in body
+    assert 'db_queries_per_request_count{method="GET",route="/workouts/{user_id}"}' in body
+    assert "db_query_duration_seconds_sum " in body
+    assert 'rate_limit_limited_total{route_class="login"}' in body
+    assert "http_requests_in_flight 1" in body  # The scrape itself
+
+    histogram = Histogram("h", "test", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(("/x",), value)
+    assert histogram.render()[2:] == [
+        'h_bucket{route="/x",le="0.1"} 2', 'h_bucket{route="/x",le="1"} 3', 'h_bucket{route="/x",le="+Inf"} 4',
+        'h_sum{route="/x"} 3.65', 'h_count{route="/x"} 4',
+    ]
+
+def test_slow_queries_and_query_budgets_are_flagged(monkeypatch, caplog):
+    """
+    Test slow statements are logged with their parameter shape, and over-budget / N+1 requests are flagged.
+    """
+    from app.core.metrics import db_query_budget_exceeded
+    clear_test_database()
+    client.post("/register", json=create_test_user())
+    client.post("/workouts", json={"user_id": 1, "exercise": "Running", "duration": 30, "date": "2025-02-11"})
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(config, "QUERY_BUDGET", 0)
+    monkeypatch.setattr(config, "N_PLUS_ONE_THRESHOLD", 1)
+
+    with caplog.at_level("WARNING"):
+        assert client.get("/workouts/1?date=2025-02-11").status_code == 200
+    slow = [r.getMessage() for r in caplog.records if r.name == "app.db.slow"]
+    assert any("FROM workouts" in message and "parameters: (int, str, str)" in message for message in slow)
+    assert not any("2025-02-11" in message for message in slow)  # Values are never logged
+    budget = [r.getMessage() for r in caplog.records if r.name == "app.db.budget"]
+    assert any("GET /workouts/{user_id} ran 1 queries (budget 0)" in message for message in budget)
+    assert any("possible N+1" in message for message in budget)
+    assert db_query_budget_exceeded._series[("GET", "/workouts/{user_id}", "budget")] >= 1
+
+def test_request_profiling_on_demand(monkeypatch):
+    """
+    Test a request with the profiling token gets its cProfile report instead of its body.
+    """
+    import marshal
+    clear_test_database()
+    client.post("/register", json=create_test_user())
+    # Disabled without a token: the header is ignored
+    assert client.get("/users/1", headers={"X-Profile": ""}).json()["user"]["id"] == 1
+
+    monkeypatch.setattr(config, "PROFILING_TOKEN", "admin-secret")
+    assert client.get("/users/1", headers={"X-Profile": "wrong"}).json()["user"]["id"] == 1
+    response = client.get("/users/1", headers={"X-Profile": "admin-secret"})
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert response.text.startswith("Profile of GET /users/1 -> 200")
+    # Threadpool database work is merged into the report
+    assert "get_user_by_id" in response.text
+
+    response = client.get("/users/1", headers={"X-Profile": "admin-secret", "X-Profile-Format": "pstats"})
+    stats = marshal.loads(response.content)
+    assert any(function_name == "get_user_by_id" for (_, _, function_name) in stats)
+
+def test_current_user_served_from_principal_cache():
+    """
+    Test a hot token resolves without DB queries and is invalidated by a password reset.
+    """
+    from app.core.security import principal_cache
+    clear_test_database()
+    user_data = create_test_user(username=f"cached_{int(time.time())}", password="oldpassword")
+    client.post("/register", json=user_data)
+    token = client.post("/login", data={
+        "username": user_data["username"],
+        "password": user_data["password"]
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/me", headers=headers).status_code == 200
+
+    queries = []
+    listener = lambda *args: queries.append(args[2])
+    sqlalchemy.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/me", headers=headers)
+    finally:
+        sqlalchemy.event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert response.json()["username"] == user_data["username"]
+    assert queries == []
+
+    client.post("/password-reset-confirm", json={
+        "username": user_data["username"],
+        "new_password": "newpassword123"
+    })
+    assert principal_cache.get(token) is None
+
+def test_migrations_run_once_and_upgrade_legacy_schema(tmp_path, caplog):
+    """
+    Test migrations add missing columns to a legacy database and are recorded once.
+    """
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy_engine.begin() as conn:
+        conn.execute(sqlalchemy.text(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL, password VARCHAR NOT NULL, "
+            "name VARCHAR NOT NULL, age INTEGER NOT NULL, gender VARCHAR, height FLOAT, weight FLOAT)"
+        ))
+
+    with caplog.at_level("INFO", logger="app.migrations"):
+        assert run_migrations(legacy_engine) == MIGRATIONS[-1][0]
+    assert [r.getMessage() for r in caplog.records if r.name == "app.migrations"][1] == "Applied schema migration 2: add users.email"
+    assert "email" in {c["name"] for c in sqlalchemy.inspect(legacy_engine).get_columns("users")}
+
+    queries = []
+    listener = lambda *args: queries.append(args[2])
+    sqlalchemy.event.listen(legacy_engine, "before_cursor_execute", listener)
+    run_migrations(legacy_engine)
+    sqlalchemy.event.remove(legacy_engine, "before_cursor_execute", listener)
+    assert not any(q.lstrip().upper().startswith(("ALTER", "CREATE")) for q in queries)
+    with legacy_engine.connect() as conn:
+        versions = conn.execute(sqlalchemy.text("SELECT version FROM schema_migrations")).scalars().all()
+    assert sorted(versions) == [version for version, _, _ in MIGRATIONS]
+
+def test_date_migration_lists_unparseable_legacy_dates(tmp_path):
+    """
+    Test the date migration refuses legacy values that are not dates, naming the rows, and converts once they are fixed.
+    """
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy_dates.db'}")
+    with legacy_engine.begin() as conn:
+        conn.execute(sqlalchemy.text(
+            "CREATE TABLE workouts (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, exercise VARCHAR NOT NULL, "
+            "duration INTEGER NOT NULL, date VARCHAR NOT NULL)"
+        ))
+        conn.execute(sqlalchemy.text(
+            "INSERT INTO workouts (id, user_id, exercise, duration, date) VALUES "
+            "(1, 1, 'Running', 30, '2024-01-05'), (2, 1, 'Rowing', 20, '2024-01-06 07:30:00'), "
+            "(3, 1, 'Yoga', 45, '06/01/2024'), (4, 1, 'Swimming', 25, 'yesterday')"
+        ))
+
+    with pytest.raises(ValueError) as excinfo:
+        run_migrations(legacy_engine)
+    message = str(excinfo.value)
+    assert "workouts.date has 2 value(s)" in message
+    assert "id 3: '06/01/2024'" in message and "id 4: 'yesterday'" in message
+    assert "id 1" not in message and "id 2" not in message
+    with legacy_engine.connect() as conn:
+        versions = conn.execute(sqlalchemy.text("SELECT version FROM schema_migrations")).scalars().all()
+    assert 3 not in versions
+
+    with legacy_engine.begin() as conn:
+        conn.execute(sqlalchemy.text("UPDATE workouts SET date = '2024-01-06' WHERE id = 3"))
+        conn.execute(sqlalchemy.text("DELETE FROM workouts WHERE id = 4"))
+    assert run_migrations(legacy_engine) == MIGRATIONS[-1][0]
+    with legacy_engine.connect() as conn:
+        dates = conn.execute(sqlalchemy.text("SELECT date FROM workouts ORDER BY id")).scalars().all()
+    assert dates == ["2024-01-05", "2024-01-06", "2024-01-06"]
+
+def test_read_engine_rejects_writes(tmp_path):
+    """
+    Test the read-only engine serves reads from the writer's file but refuses writes.
+    """
+    url = f"sqlite:///{tmp_path / 'split.db'}"
+    writer = make_engine(url, pool_size=1, max_overflow=0)
+    reader = make_engine(url, pool_size=1, max_overflow=0, read_only=True)
+    run_migrations(writer)
+    with writer.begin() as conn:
+        conn.execute(sqlalchemy.text(
+            "INSERT INTO users (username, password, name, age) VALUES ('split', 'x', 'Split', 30)"
+        ))
+
+    with reader.connect() as conn:
+        assert conn.execute(sqlalchemy.text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(sqlalchemy.text("SELECT username FROM users")).scalars().all() == ["split"]
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            conn.execute(sqlalchemy.text("DELETE FROM users"))
+
+def test_routes_run_on_async_sessions(tmp_path):
+    """
+    Test the routers serve requests from async sessions (aiosqlite) as well as sync ones.
+    """
+    url = f"sqlite+aiosqlite:///{tmp_path / 'async.db'}"
+    run_migrations(make_engine(url.replace("+aiosqlite", ""), pool_size=1, max_overflow=0))
+    async_engine = make_async_engine(url, pool_size=5, max_overflow=0)
+    sessions = []
+
+    async def override_get_async_db():
+        async with AsyncSession(async_engine) as db:
+            sessions.append(db)
+            yield db
+
+    with patch.dict(app.dependency_overrides, {get_db: override_get_async_db, get_read_db: override_get_async_db}):
+        response = client.post("/register", json={"username": "asyncuser", "password": "asyncpassword", "name": "Async", "age": 30})
+        assert response.status_code == 200
+        user_id = response.json()["user"]["id"]
+        token = client.post("/login", data={"username": "asyncuser", "password": "asyncpassword"}).json()["access_token"]
+        assert client.get("/me", headers={"Authorization": f"Bearer {token}"}).json()["username"] == "asyncuser"
+
+        assert client.post("/workouts", json={"user_id": user_id, "exercise": "Row", "duration": 20, "date": "2025-02-01"}).status_code == 200
+        assert client.post("/nutrition", json={"user_id": user_id, "food": "Rice", "calories": 300, "date": "2025-02-01"}).status_code == 200
+        assert client.post("/weight", json={"user_id": user_id, "weight": 70.5, "date": "2025-02-01"}).status_code == 200
+        assert client.post("/weight/bulk", json=[{"user_id": user_id, "weight": 70.0, "date": "2025-02-02"}]).json()["created"] == 1
+
+        assert client.get(f"/workouts/{user_id}", params={"date": "2025-02-01"}).json()["workouts"][0]["exercise"] == "Row"
+        assert client.get(f"/nutrition/{user_id}").json()["logs"][0]["food"] == "Rice"
+        assert len(client.get(f"/weight/{user_id}", params={"limit": 1}).json()["logs"]) == 1
+        assert client.get(f"/users/{user_id}").json()["user"]["username"] == "asyncuser"
+    assert sessions and all(isinstance(db, AsyncSession) for db in sessions)
+
+def test_nutrition_and_weight_keyset_pagination():
+    """
+    Test paging through nutrition and weight logs with limit and next_cursor.
+    """
+    clear_test_database()
+    user_data = create_test_user(username=f"pager_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+    for i in range(5):
+        client.post("/nutrition", json={"user_id": user_id, "food": f"Meal {i}", "calories": 100 + i})
+        client.post("/weight", json={"user_id": user_id, "weight": 80 - i, "date": f"2025-01-0{5 - i}"})
+
+    for path, key in ((f"/nutrition/{user_id}", "food"), (f"/weight/{user_id}", "weight")):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(path, params=params)
+            assert response.status_code == 200
+            page = response.json()
+            seen.extend(log[key] for log in page["logs"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert pages == 3
+        assert len(seen) == 5
+
+    weights = client.get(f"/weight/{user_id}", params={"limit": 5}).json()["logs"]
+    assert [log["date"] for log in weights] == sorted(log["date"] for log in weights)
+    assert client.get(f"/nutrition/{user_id}", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_crafted_cursors_are_rejected():
+    """
+    Test well-formed cursors holding values of the wrong type get a 400, not a 500.
+    """
+    from app.core.pagination import encode_cursor
+    clear_test_database()
+    user_id = client.post("/register", json=create_test_user(username=f"cursor_{int(time.time())}")).json()["user"]["id"]
+    client.post("/nutrition", json={"user_id": user_id, "food": "Meal", "calories": 100})
+    client.post("/weight", json={"user_id": user_id, "weight": 80, "date": "2025-01-01"})
+
+    for cursor in (encode_cursor({}), encode_cursor("5"), encode_cursor(True), encode_cursor([1])):
+        response = client.get(f"/nutrition/{user_id}", params={"limit": 5, "cursor": cursor})
+        assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor"
+    for cursor in (encode_cursor("2025-01-01", {}), encode_cursor(20250101, 1), encode_cursor("January", 1)):
+        response = client.get(f"/weight/{user_id}", params={"limit": 5, "cursor": cursor})
+        assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor"
+    assert client.get(f"/nutrition/{user_id}", params={"cursor": encode_cursor(0)}).status_code == 200
+
+def test_date_range_queries():
+    """
+    Test from/to filtering on workouts, nutrition and weight logs.
+    """
+    clear_test_database()
+    user_data = create_test_user(username=f"ranger_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+    for day in ("2025-03-01", "2025-03-05", "2025-03-10"):
+        client.post("/workouts", json={"user_id": user_id, "exercise": "Rowing", "duration": 20, "date": day})
+        client.post("/weight", json={"user_id": user_id, "weight": 80.0, "date": day})
+        client.post("/nutrition", json={"user_id": user_id, "food": "Oats", "calories": 300, "date": day})
+
+    week = {"from": "2025-03-01", "to": "2025-03-07"}
+    workouts = client.get(f"/workouts/{user_id}", params=week).json()["workouts"]
+    assert [w["date"] for w in workouts] == ["2025-03-01", "2025-03-05"]
+    assert len(client.get(f"/workouts/{user_id}", params={"date": "2025-03-10"}).json()["workouts"]) == 1
+    assert client.get(f"/workouts/{user_id}").status_code == 400
+    assert len(client.get(f"/weight/{user_id}", params=week).json()["logs"]) == 2
+    assert len(client.get(f"/nutrition/{user_id}", params={"from": "2025-03-05"}).json()["logs"]) == 2
+
+def explain_query_plan(conn, query) -> str:
+    compiled = query.statement.compile(dialect=conn.dialect)
+    params = tuple(
+        value.isoformat() if hasattr(value, "isoformat") else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).fetchall()
+    return " ".join(str(row[-1]) for row in rows)
+
+def test_date_range_queries_use_composite_indexes(tmp_path):
+    """
+    Test the per-user date range queries are planned on the (user_id, date) indexes.
+    """
+    from datetime import date
+    from app.api.workouts import query_workouts
+    from app.api.weight import query_weight_logs
+    from app.api.nutrition import query_nutrition_logs
+
+    plan_engine = create_engine(f"sqlite:///{tmp_path / 'plan.db'}")
+    run_migrations(plan_engine)
+    session = sessionmaker(bind=plan_engine)()
+    start, end = date(2025, 1, 1), date(2025, 1, 31)
+    try:
+        with plan_engine.connect() as conn:
+            assert "ix_workouts_user_id_date" in explain_query_plan(conn, query_workouts(session, 1, start, end))
+            assert "ix_weight_logs_user_id_date" in explain_query_plan(conn, query_weight_logs(session, 1, start, end))
+            assert "ix_nutrition_logs_user_id_date" in explain_query_plan(conn, query_nutrition_logs(session, 1, start, end))
+    finally:
+        session.close()
+
+def test_nutrition_pages_are_index_range_scans(tmp_path):
+    """
+    Test a deep nutrition page is read in id order from ix_nutrition_logs_user_id_id, without sorting the history.
+    """
+    from app.api.nutrition import query_nutrition_logs
+    from app.models import NutritionLogDB
+
+    plan_engine = create_engine(f"sqlite:///{tmp_path / 'plan.db'}")
+    run_migrations(plan_engine)
+    session = sessionmaker(bind=plan_engine)()
+    try:
+        page = query_nutrition_logs(session, 1).filter(NutritionLogDB.id > 5000).limit(51)
+        with plan_engine.connect() as conn:
+            plan = explain_query_plan(conn, page)
+        assert "ix_nutrition_logs_user_id_id" in plan
+        assert "TEMP B-TREE" not in plan
+    finally:
+        session.close()
+
+def test_bulk_ingestion_reports_per_item_results():
+    """
+    Test bulk endpoints insert valid entries in one go and report invalid ones per item.
+    """
+    clear_test_database()
+    user_data = create_test_user(username=f"bulker_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+
+    workouts = [{"user_id": user_id, "exercise": "Bike", "duration": 40, "date": f"2025-04-{day:02d}"} for day in range(1, 6)]
+    workouts.append({"user_id": user_id, "exercise": "Bike", "duration": "long", "date": "2025-04-06"})
+    response = client.post("/workouts/bulk", json=workouts)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 5 and body["failed"] == 1
+    assert body["results"][5]["status"] == "invalid"
+    assert all(isinstance(r["id"], int) for r in body["results"][:5])
+    assert len(client.get(f"/workouts/{user_id}", params={"from": "2025-04-01", "to": "2025-04-30"}).json()["workouts"]) == 5
+
+    meals = [{"user_id": user_id, "food": "Rice", "calories": 200, "date": "2025-04-01"}] * 3
+    assert client.post("/nutrition/bulk", json=meals).json()["created"] == 3
+
+    weights = [
+        {"user_id": user_id, "weight": 81.5, "date": "2025-04-01"},
+        {"user_id": 987654321, "weight": 70.0, "date": "2025-04-01"},
+    ]
+    body = client.post("/weight/bulk", json=weights).json()
+    assert body["created"] == 1
+    assert body["results"][1]["errors"][0]["msg"] == "User not found"
+
+def test_bulk_ingestion_batches_inserts():
+    """
+    Test a bulk request inserts its rows in a few multi-row statements, with ids in request order.
+    """
+    clear_test_database()
+    user_id = client.post("/register", json=create_test_user(username=f"batcher_{int(time.time())}")).json()["user"]["id"]
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    sqlalchemy.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        weights = [{"user_id": user_id, "weight": 80 + i / 10, "date": f"2025-05-{i + 1:02d}"} for i in range(20)]
+        body = client.post("/weight/bulk", json=weights).json()
+    finally:
+        sqlalchemy.event.remove(engine, "before_cursor_execute", listener)
+    assert body["created"] == 20
+    assert sum(statement.lstrip().upper().startswith("INSERT INTO WEIGHT_LOGS") for statement in statements) == 1
+
+    ids = [result["id"] for result in body["results"]]
+    assert ids == sorted(ids)
+    logs = client.get(f"/weight/{user_id}", params={"from": "2025-05-01", "to": "2025-05-31"}).json()["logs"]
+    assert {log["id"]: log["weight"] for log in logs} == {new_id: item["weight"] for new_id, item in zip(ids, weights)}
+
+def test_daily_summaries_follow_inserts_and_deletes():
+    """
+    Test daily rollups are kept in step with single, bulk and deleted entries, and the backfill agrees.
+    """
+    clear_test_database()
+    user_data = create_test_user(username=f"summary_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+
+    workout_id = client.post("/workouts", json={"user_id": user_id, "exercise": "Run", "duration": 30, "date": "2025-05-01"}).json()["workout"]["id"]
+    client.post("/workouts/bulk", json=[{"user_id": user_id, "exercise": "Swim", "duration": 45, "date": "2025-05-02"}] * 2)
+    client.post("/nutrition", json={"user_id": user_id, "food": "Eggs", "calories": 150, "date": "2025-05-01"})
+    log_id = client.post("/nutrition", json={"user_id": user_id, "food": "Pasta", "calories": 600, "date": "2025-05-01"}).json()["log"]["id"]
+    client.post("/nutrition/bulk", json=[{"user_id": user_id, "food": "Apple", "calories": 80, "date": "2025-05-03"}])
+
+    assert client.delete(f"/nutrition/{log_id}").status_code == 200
+    assert client.delete(f"/workouts/{workout_id}").status_code == 200
+    assert client.delete(f"/workouts/{workout_id}").status_code == 404
+
+    response = client.get(f"/summary/{user_id}", params={"from": "2025-05-01", "to": "2025-05-02"})
+    assert response.status_code == 200
+    assert response.json()["days"] == [
+        {"date": "2025-05-01", "total_calories": 150, "nutrition_entries": 1, "workout_minutes": 0, "workout_sessions": 0},
+        {"date": "2025-05-02", "total_calories": 0, "nutrition_entries": 0, "workout_minutes": 90, "workout_sessions": 2},
+    ]
+    incremental = client.get(f"/summary/{user_id}").json()["days"]
+    assert len(incremental) == 3
+
+    session = TestingSessionLocal()
+    try:
+        assert backfill(session, user_id) == 3
+    finally:
+        session.close()
+    assert client.get(f"/summary/{user_id}").json()["days"] == incremental
+
+def test_dashboard_combines_profile_and_daily_data():
+    """
+    Test /dashboard returns the profile, the day's workouts and calories and the latest weight at once.
+    """
+    clear_test_database()
+    user_data = create_test_user(username=f"dash_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+    token = client.post("/login", data={"username": user_data["username"], "password": user_data["password"]}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client.post("/workouts", json={"user_id": user_id, "exercise": "Squat", "duration": 25, "date": "2025-06-10"})
+    client.post("/workouts", json={"user_id": user_id, "exercise": "Run", "duration": 40, "date": "2025-06-11"})
+    client.post("/nutrition/bulk", json=[{"user_id": user_id, "food": "Oats", "calories": 350, "date": "2025-06-10"}] * 2)
+    client.post("/weight", json={"user_id": user_id, "weight": 79.0, "date": "2025-06-01"})
+    client.post("/weight", json={"user_id": user_id, "weight": 78.4, "date": "2025-06-09"})
+
+    assert client.get("/dashboard").status_code == 401
+    response = client.get("/dashboard", params={"date": "2025-06-10"}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"]["username"] == user_data["username"]
+    assert [w["exercise"] for w in body["workouts"]] == ["Squat"]
+    assert body["calories"] == {"total": 700, "entries": 2}
+    assert body["latest_weight"] == {"weight": 78.4, "date": "2025-06-09"}
+
+    empty = client.get("/dashboard", params={"date": "2025-06-20"}, headers=headers).json()
+    assert empty["workouts"] == [] and empty["calories"] == {"total": 0, "entries": 0}
+
+def test_trend_math_matches_reference_loop():
+    """
+    Test the vectorized moving average and chunked EWMA agree with the plain recurrences.
+    """
+    rng = np.random.default_rng(7)
+    weights = 90 - np.arange(5000) * 0.01 + rng.normal(0, 0.5, 5000)
+    for alpha in (0.1, 0.5, 0.9):
+        expected = [weights[0]]
+        for value in weights[1:]:
+            expected.append(alpha * value + (1 - alpha) * expected[-1])
+        assert np.allclose(ewma(weights, alpha), expected)
+    expected_average = [weights[max(0, i - 6):i + 1].mean() for i in range(len(weights))]
+    assert np.allclose(moving_average(weights, 7), expected_average)
+
+def test_trend_settings_are_validated(monkeypatch):
+    """
+    Test out-of-range trend smoothing and window settings fail fast with a clear error.
+    """
+    from app.core.config import Config
+    for alpha in (0, -0.5, 1.5):
+        with pytest.raises(ValueError, match="alpha"):
+            ewma(np.array([80.0, 79.5]), alpha)
+        monkeypatch.setattr(Config, "TREND_ALPHA", alpha)
+        with pytest.raises(ValueError, match="TREND_ALPHA"):
+            Config()
+    monkeypatch.setattr(Config, "TREND_ALPHA", 0.1)
+    monkeypatch.setattr(Config, "TREND_WINDOW", 0)
+    with pytest.raises(ValueError, match="TREND_WINDOW"):
+        Config()
+    with pytest.raises(ValueError, match="window"):
+        moving_average(np.array([80.0]), 0)
+    assert ewma(np.array([80.0, 79.0]), 1.0).tolist() == [80.0, 79.0]
+
+def test_weight_trend_is_cached_and_updated_incrementally():
+    """
+    Test /weight/{id}/trend builds the trend once, then folds new logs in without a rebuild.
+    """
+    clear_test_database()
+    trend_cache.clear()
+    user_data = create_test_user(username=f"trend_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+    logs = [{"user_id": user_id, "weight": 90 - day * 0.1, "date": f"2025-07-{day:02d}"} for day in range(1, 21)]
+    assert client.post("/weight/bulk", json=logs).json()["created"] == 20
+
+    with patch("app.api.weight.TrendState", wraps=TrendState) as built:
+        first = client.get(f"/weight/{user_id}/trend", params={"target": 85}).json()
+        client.post("/weight", json={"user_id": user_id, "weight": 87.8, "date": "2025-07-21"})
+        second = client.get(f"/weight/{user_id}/trend", params={"target": 85}).json()
+        assert built.call_count == 1
+
+    assert len(first["points"]) == 20 and len(second["points"]) == 21
+    assert first["slope_kg_per_day"] == pytest.approx(-0.1)
+    assert first["projected_date"] > "2025-07-20"
+    assert client.get(f"/weight/{user_id}/trend", params={"target": 95}).json()["projected_date"] is None
+
+    # The incrementally updated trend matches a rebuild from scratch
+    trend_cache.clear()
+    assert client.get(f"/weight/{user_id}/trend", params={"target": 85}).json() == second
+
+    # A backdated log forces a rebuild that includes it
+    client.post("/weight", json={"user_id": user_id, "weight": 91.0, "date": "2025-06-30"})
+    rebuilt = client.get(f"/weight/{user_id}/trend").json()
+    assert rebuilt["points"][0] == {"date": "2025-06-30", "weight": 91.0, "moving_average": 91.0, "trend": 91.0}
+    assert client.get("/weight/987654321/trend").status_code == 404
+
+def test_read_endpoints_only_expose_their_response_models():
+    """
+    Test read endpoints return exactly their declared fields (no password hash, no ORM internals).
+    """
+    user_data = create_test_user(username=f"projected_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+    client.post("/weight", json={"user_id": user_id, "weight": 72.0, "date": "2025-08-01"})
+
+    user = client.get(f"/users/{user_id}").json()["user"]
+    assert "password" not in user
+    assert set(user) == {"id", "username", "name", "age", "gender", "height", "weight", "email"}
+
+    body = client.get(f"/weight/{user_id}").json()
+    assert set(body) == {"logs"}
+    assert body["logs"] == [{"id": body["logs"][0]["id"], "user_id": user_id, "weight": 72.0, "date": "2025-08-01"}]
+    assert set(client.get(f"/weight/{user_id}", params={"limit": 10}).json()) == {"logs", "next_cursor"}
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_export_streams_full_history(export_format):
+    """
+    Test the export streams every record in date order, plain and gzipped, in small chunks.
+    """
+    user_data = create_test_user(username=f"export_{export_format}_{int(time.time())}")
+    user_id = client.post("/register", json=user_data).json()["user"]["id"]
+    client.post("/workouts/bulk", json=[
+        {"user_id": user_id, "exercise": "Run", "duration": 30 + day, "date": f"2025-09-{day:02d}"} for day in range(1, 8)
+    ])
+    client.post("/nutrition", json={"user_id": user_id, "food": "Soup, tomato", "calories": 120, "date": "2025-09-02"})
+    client.post("/weight", json={"user_id": user_id, "weight": 70.2, "date": "2025-09-03"})
+
+    with patch.object(config, "EXPORT_CHUNK_ROWS", 2):
+        plain = client.get(f"/export/{user_id}", params={"format": export_format})
+        zipped = client.get(f"/export/{user_id}", params={"format": export_format, "gzip": "true"})
+    assert plain.status_code == 200
+    assert zipped.headers["content-type"] == "application/gzip"
+    assert zipped.headers["content-disposition"].endswith(f".{export_format}.gz")
+    assert gzip.decompress(zipped.content) == plain.content
+
+    if export_format == "ndjson":
+        records = [json.loads(line) for line in plain.text.splitlines()]
+    else:
+        records = list(csv.DictReader(io.StringIO(plain.text)))
+    assert [record["type"] for record in records] == ["workout"] * 7 + ["nutrition", "weight"]
+    assert [record["date"] for record in records[:7]] == [f"2025-09-{day:02d}" for day in range(1, 8)]
+    assert records[7]["food"] == "Soup, tomato"
+    assert float(records[8]["weight"]) == 70.2
+
+# Tests that load production-scale data; run with RUN_SLOW_TESTS=1
+slow = pytest.mark.skipif(os.getenv("RUN_SLOW_TESTS") != "1", reason="slow; set RUN_SLOW_TESTS=1")
+EXPORT_LARGE_ROWS = int(os.getenv("EXPORT_LARGE_ROWS", "1000000"))
+EXPORT_PEAK_MEMORY_MIB = 16
+
+@slow
+def test_export_of_a_million_row_history_stays_within_memory_ceiling(tmp_path):
+    """
+    Test streaming a million-row synthetic history emits every row with bounded peak memory.
+    """
+    import tracemalloc
+    from datetime import timedelta
+    from app.api.export import stream_export
+    from app.models import NutritionLogDB, UserDB, WeightLogDB, WorkoutDB
+
+    large_engine = make_engine(f"sqlite:///{tmp_path / 'large.db'}", pool_size=2, max_overflow=0)
+    run_migrations(large_engine)
+    start, per_type, batch = date(1990, 1, 1), EXPORT_LARGE_ROWS // 3, 50_000
+    with large_engine.begin() as conn:
+        user_id = conn.execute(sqlalchemy.insert(UserDB).values(username="large", password="x", name="Large", age=30)).inserted_primary_key[0]
+        for model, values in (
+            (WorkoutDB, {"exercise": "Run", "duration": 30}),
+            (NutritionLogDB, {"food": "Rice, white", "calories": 300}),
+            (WeightLogDB, {"weight": 80.5}),
+        ):
+            count = per_type + (EXPORT_LARGE_ROWS - 3 * per_type if model is WeightLogDB else 0)
+            for offset in range(0, count, batch):
+                conn.execute(sqlalchemy.insert(model), [
+                    {"user_id": user_id, "date": start + timedelta(days=i // 3), **values}
+                    for i in range(offset, min(offset + batch, count))
+                ])
+
+    tracemalloc.start()
+    try:
+        lines = sum(chunk.count(b"\n") for chunk in stream_export(sessionmaker(bind=large_engine), user_id, "ndjson", False))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        large_engine.dispose()
+    assert lines == EXPORT_LARGE_ROWS
+    assert peak < EXPORT_PEAK_MEMORY_MIB * 1024 * 1024
+
+def test_seed_is_deterministic_and_consistent_with_rollups(tmp_path, request):
+    """
+    Test seeded data depends only on the seed and its daily summaries match a backfill.
+    """
+    db_logger = logging.getLogger("app.db")
+    request.addfinalizer(lambda level=db_logger.level: db_logger.setLevel(level))  # Workers silence it
+
+    def rows(conn, table):
+        # Log ids depend on insert order, everything else must not
+        result = conn.execute(sqlalchemy.text(f"SELECT * FROM {table}"))
+        skip = 1 if "id" in result.keys() and table != "users" else 0
+        return sorted(tuple(row[skip:]) for row in result)
+
+    snapshots = []
+    for name, tasks in (("one.db", [(1, 6)]), ("split.db", [(4, 3), (1, 3)])):
+        url = f"sqlite:///{tmp_path / name}"
+        run_migrations(make_engine(url, pool_size=1, max_overflow=0))
+        seed._init_worker(url)
+        for first_id, count in tasks:
+            seed.seed_users(first_id, count, 7, date(2024, 1, 1), 400, "hash", batch_size=500)
+        with seed._engine.connect() as conn:
+            snapshots.append({table: rows(conn, table) for table in ("users", "workouts", "nutrition_logs", "weight_logs", "daily_summaries")})
+        with sessionmaker(bind=seed._engine)() as db:
+            backfill(db)
+            db.commit()
+            assert rows(db.connection(), "daily_summaries") == snapshots[-1]["daily_summaries"]
+
+    one, split = snapshots
+    assert len(one["users"]) == 6 and all(one[table] for table in one)
+    assert one == split
+
+def test_api_import_defers_heavy_dependencies():
+    """
+    Test importing the API leaves bcrypt, PyJWT, PyYAML and NumPy for the requests that need them.
+    """
+    import subprocess
+    import sys
+    code = "import sys, app.main; print(sorted({'bcrypt', 'jwt', 'yaml', 'numpy'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env={**os.environ, "DATABASE_URL": "sqlite://", "READ_DATABASE_URL": "sqlite://"})
+    assert result.stdout.split("\n")[-2] == "[]"
+
+def test_openapi_schema_served_from_prebuilt_file(tmp_path, monkeypatch):
+    """
+    Test the docs use the prebuilt schema while it matches the sources, and rebuild it when stale.
+    """
+    path = tmp_path / "openapi.json"
+    monkeypatch.setattr(config, "OPENAPI_SCHEMA_PATH", str(path))
+    monkeypatch.setattr(app, "openapi_schema", None)
+    schema = openapi.write_schema(app, str(path))
+    assert schema["info"]["title"] == config.APP_TITLE and "/login" in schema["paths"]
+
+    prebuilt = json.loads(path.read_text())
+    prebuilt["schema"]["info"]["title"] = "Prebuilt"
+    path.write_text(json.dumps(prebuilt))
+    app.openapi_schema = None
+    assert client.get("/openapi.json").json()["info"]["title"] == "Prebuilt"
+
+    prebuilt["fingerprint"] = "stale"
+    path.write_text(json.dumps(prebuilt))
+    app.openapi_schema = None
+    assert client.get("/openapi.json").json() == schema
+